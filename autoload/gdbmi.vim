@@ -16,9 +16,14 @@ function! gdbmi#send(cmd)
   call gdbmi#send_line(a:cmd)
 endfunction
 
-function! gdbmi#navigate(cmd)
+" run control goes over MI, see Session.exec
+function! gdbmi#exec(cmd, ...)
   if !exists('t:gdbmi_gdb_job_id') | return | endif
-  call gdbmi#send_line(a:cmd)
+  call call('gdbmi#util#rpcnotify', ['gdbmi_exec', t:gdbmi_buf_name, a:cmd] + a:000)
+endfunction
+
+function! gdbmi#navigate(cmd)
+  call gdbmi#exec(a:cmd)
 endfunction
 
 function! gdbmi#eval(expr)
@@ -32,23 +37,65 @@ function! gdbmi#toggle_break_line()
   let l:filename = expand('#'.l:buf.':p')
   let l:line = line('.')
 
-  let l:cmd = gdbmi#util#rpcrequest('gdbmi_breaktoggle', t:gdbmi_buf_name, l:filename, l:line)
+  let l:number = get(t:gdbmi_breakpoints, l:filename.':'.l:line, 0)
 
-  call gdbmi#send(l:cmd)
+  if l:number
+    call gdbmi#send('delete '.l:number)
+  else
+    call gdbmi#send('break '.l:filename.':'.l:line)
+  endif
 endfunction
 
 function! gdbmi#get_breakpoint_list() abort
   if !exists('t:gdbmi_gdb_job_id') | return | endif
 
-  let g:gdbmi_jump_locations = gdbmi#util#rpcrequest('gdbmi_getbreakpoints', t:gdbmi_buf_name)
-
+  " the gdbmi-locations source pages them in with gdbmi#locations()
   doautocmd <nomodeline> User GDBMILocationChange
 endfunction
 
+" Ask for Denite candidates start to start + count of the session's location
+" list; the session sends the page back, see gdbmi#take_locations()
+function! gdbmi#locations(kind, cwd, start, count) abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  if !a:start
+    let t:gdbmi_location_pages = {}
+  endif
+  call gdbmi#util#rpcnotify('gdbmi_locations', t:gdbmi_buf_name,
+        \ a:kind, a:cwd, a:start, a:count)
+endfunction
+
+" The page asked for by gdbmi#locations(), v:null until it has arrived
+function! gdbmi#take_locations(kind, start) abort
+  if !exists('t:gdbmi_channel_id') | return [] | endif
+  let l:key = a:kind.':'.a:start
+  return has_key(t:gdbmi_location_pages, l:key) ? remove(t:gdbmi_location_pages, l:key) : v:null
+endfunction
+
 function! gdbmi#break_expr(expr)
   call gdbmi#send(printf('break %s', a:expr))
 endfunction
 
+" [name, file, line] of the functions matching text, from the session's index
+function! gdbmi#symbols(text, limit) abort
+  if !exists('t:gdbmi_channel_id') | return [] | endif
+  return gdbmi#util#rpcrequest('gdbmi_symbols', t:gdbmi_buf_name, a:text, a:limit)
+endfunction
+
+function! gdbmi#complete_symbol(arglead, cmdline, cursorpos) abort
+  return uniq(map(gdbmi#symbols(a:arglead, 200), 'v:val[0]'))
+endfunction
+
 function! gdbmi#display(expr)
   call gdbmi#util#rpcnotify('gdbmi_display', t:gdbmi_buf_name, a:expr)
 endfunction
+
+function! gdbmi#stats() abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  call gdbmi#util#rpcnotify('gdbmi_stats', t:gdbmi_buf_name)
+endfunction
+
+function! gdbmi#display_history(expr, ...) abort
+  let l:first = get(a:000, 0, 0)
+  let l:last = get(a:000, 1, -1)
+  call gdbmi#util#rpcnotify('gdbmi_display_history', t:gdbmi_buf_name, a:expr, l:first, l:last)
+endfunction
@@ -62,3 +62,68 @@ endfunction
 
 function! gdbmi#display#virtual_display(context) abort
 endfunction
+
+function! s:watch_buf() abort
+  let l:name = t:gdbmi_buf_name . '_display'
+  let l:buf = bufnr(l:name)
+  if l:buf < 0
+    let l:buf = nvim_create_buf(v:false, v:true)
+    call nvim_buf_set_name(l:buf, l:name)
+    call nvim_buf_set_option(l:buf, 'filetype', 'gdbmi_display')
+    call nvim_buf_set_keymap(l:buf, 'n', '<CR>',
+          \ '<cmd>call gdbmi#display#toggle_expand()<CR>', {'noremap': v:true, 'silent': v:true})
+  endif
+  if bufwinid(l:buf) == -1
+    let l:win = win_getid()
+    execute 'noautocmd botright 8split' l:name
+    setlocal winfixheight nonumber norelativenumber signcolumn=no
+    noautocmd call win_gotoid(l:win)
+  endif
+  return l:buf
+endfunction
+
+function! gdbmi#display#render_watches(lines) abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  call nvim_buf_set_lines(s:watch_buf(), 0, -1, v:true, a:lines)
+endfunction
+
+function! gdbmi#display#update_watches(updates) abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  let l:buf = s:watch_buf()
+  for [l:row, l:text] in a:updates
+    call nvim_buf_set_lines(l:buf, l:row, l:row + 1, v:true, [l:text])
+  endfor
+endfunction
+
+function! gdbmi#display#toggle_expand() abort
+  call gdbmi#util#rpcnotify('gdbmi_display_expand', t:gdbmi_buf_name, line('.') - 1)
+endfunction
+
+function! gdbmi#display#show_stats(lines) abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  let l:name = t:gdbmi_buf_name . '_stats'
+  let l:buf = bufnr(l:name)
+  if l:buf < 0
+    let l:buf = nvim_create_buf(v:false, v:true)
+    call nvim_buf_set_name(l:buf, l:name)
+  endif
+  call nvim_buf_set_lines(l:buf, 0, -1, v:true, a:lines)
+  if bufwinid(l:buf) == -1
+    execute 'botright split' l:name
+  endif
+endfunction
+
+function! gdbmi#display#show_history(expr, lines) abort
+  if !exists('t:gdbmi_channel_id') | return | endif
+  let l:name = t:gdbmi_buf_name . '_history'
+  let l:buf = bufnr(l:name)
+  if l:buf < 0
+    let l:buf = nvim_create_buf(v:false, v:true)
+    call nvim_buf_set_name(l:buf, l:name)
+  endif
+  let l:header = printf('%8s %6s %-18s %s', 'stop', 'thread', 'pc', a:expr)
+  call nvim_buf_set_lines(l:buf, 0, -1, v:true, [l:header] + a:lines)
+  if bufwinid(l:buf) == -1
+    execute 'botright vsplit' l:name
+  endif
+endfunction
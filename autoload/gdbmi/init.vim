@@ -15,19 +15,22 @@ function! s:UndefCommands()
   delcommand GDBMIInterrupt
   delcommand GDBMIEvalWord
   delcommand GDBMIDisplay
+  delcommand GDBMIDisplayHistory
   delcommand GDBMIListBreakpoints
+  delcommand GDBMIStats
+  delcommand GDBMIBreakpointFunction
 endfunction
 
 function! s:DefineCommands()
   command! GDBMIDebugStop        call gdbmi#kill()
   command! GDBMIBreakpointToggle call gdbmi#toggle_break_line()
-  command! GDBMIRun              call gdbmi#send('run')
-  command! GDBMIUntil            call gdbmi#send('until ' . line('.'))
-  command! GDBMIAdvance          call gdbmi#send('advance '.expand('<cword>'))
-  command! GDBMIContinue         call gdbmi#send('c')
-  command! GDBMINext             call gdbmi#send('n')
-  command! GDBMIStep             call gdbmi#send('s')
-  command! GDBMIFinish           call gdbmi#send('finish')
+  command! GDBMIRun              call gdbmi#exec('run')
+  command! GDBMIUntil            call gdbmi#exec('until', expand('%:p').':'.line('.'))
+  command! GDBMIAdvance          call gdbmi#exec('advance', expand('<cword>'))
+  command! GDBMIContinue         call gdbmi#exec('continue')
+  command! GDBMINext             call gdbmi#exec('next')
+  command! GDBMIStep             call gdbmi#exec('step')
+  command! GDBMIFinish           call gdbmi#exec('finish')
   command! GDBMIFrameUp          call gdbmi#navigate('up')
   command! GDBMIFrameDown        call gdbmi#navigate('down')
   command! GDBMIInterrupt        call gdbmi#interrupt()
@@ -37,9 +40,13 @@ function! s:DefineCommands()
   command! -range GDBMIEvalRange call gdbmi#eval(gdbmi#util#get_selection(<f-args>))
   command! -range GDBMIDisplayRange call gdbmi#display(gdbmi#util#get_selection(<f-args>))
   command! -range GDBMIBreakpointExpr call gdbmi#break_expr(gdbmi#util#get_selection(<f-args>))
+  command! -nargs=1 -complete=customlist,gdbmi#complete_symbol
+        \ GDBMIBreakpointFunction call gdbmi#break_expr(<q-args>)
 
   command! -nargs=1 GDBMIDisplay call gdbmi#display(<f-args>)
+  command! -nargs=1 GDBMIDisplayHistory call gdbmi#display_history(<q-args>)
   command! GDBMIListBreakpoints call gdbmi#get_breakpoint_list()
+  command! GDBMIStats call gdbmi#stats()
 endfunction
 
 function! s:InitAutocmd()
@@ -76,9 +83,9 @@ function! s:StartGDBMI()
     endtry
   else
     try
-      call _gdbmi_start(t:gdbmi_buf_name)
+      let l:tty = _gdbmi_start(t:gdbmi_buf_name)
       let t:gdbmi_channel_id = g:gdbmi_channel_id
-      return gdbmi#util#rpcrequest('gdbmi_getslave', t:gdbmi_buf_name)
+      return l:tty
     catch
       echo v:exception
       call gdbmi#util#print_error(
@@ -97,11 +104,16 @@ function! s:CheckPrerequisite() abort
       return v:false
     endif
 
-    if !has('nvim-0.3.0')
+    " sign_placelist(), sign_unplacelist() and bufadd()
+    if !has('nvim-0.5.0')
       call gdbmi#util#print_error(
-            \ 'gdbmi.nvim requires Neovim +v0.3.0')
+            \ 'gdbmi.nvim requires Neovim +v0.5.0')
       return v:false
     endif
+  elseif !has('patch-8.1.1682')
+    call gdbmi#util#print_error(
+          \ 'gdbmi.nvim requires Vim 8.1.1682 or later')
+    return v:false
   endif
 
   return v:true
@@ -146,10 +158,9 @@ function! gdbmi#init#Spawn(cmd, mods, new_inferior_tty) abort
 
   execute "autocmd GDBMI TermClose" t:gdbmi_buf_name "call gdbmi#init#teardown()"
 
-  call gdbmi#send('echo hello gdbmi.nvim\n')
   call gdbmi#send('new-ui mi '.l:new_ui_tty)
-  call gdbmi#send('set annotate 1')
-  call gdbmi#send('set pagination off')
+  " the rest goes over MI as one batch, once the MI channel is up
+  let l:startup = ['set annotate 1', 'set pagination off']
 
   if a:new_inferior_tty !=? 'none'
     split term://tail -f /dev/null
@@ -159,12 +170,21 @@ function! gdbmi#init#Spawn(cmd, mods, new_inferior_tty) abort
     if a:new_inferior_tty ==? 'hide'
       hide
     endif
-    call gdbmi#send('set inferior-tty '.t:gdbmi_inferior_tty)
+    call add(l:startup, 'set inferior-tty '.t:gdbmi_inferior_tty)
   endif
 
-  for cmd in g:gdbmi_run_commands
-    call gdbmi#send(cmd)
-  endfor
+  call gdbmi#util#rpcnotify('gdbmi_startup', t:gdbmi_buf_name,
+        \ l:startup + g:gdbmi_run_commands, g:gdbmi_breakpoint_dir, getcwd())
+endfunction
+
+function! gdbmi#init#on_ready(name, ms) abort
+  let l:tab = gdbmi#util#session_tab(a:name)
+  if l:tab
+    call settabvar(l:tab, 'gdbmi_startup_ms', a:ms)
+  endif
+  if exists('#User#GDBMIReady')
+    doautocmd <nomodeline> User GDBMIReady
+  endif
 endfunction
 
 function! gdbmi#init#teardown()
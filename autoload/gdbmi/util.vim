@@ -2,6 +2,10 @@ function! gdbmi#util#print_error(msg) abort
   echohl Error | echomsg '[gdbmi]: ' . a:msg | echohl None
 endfunction
 
+function! gdbmi#util#print_message(msg) abort
+  echomsg '[gdbmi]: ' . a:msg
+endfunction
+
 function! gdbmi#util#has_yarp() abort
   if !g:gdbmi_use_yarp
     return v:false
@@ -58,7 +62,10 @@ function! gdbmi#util#init() abort
   let t:gdbmi_cursor_line = -1
   let t:gdbmi_cursor_sign_id = -1
 
-  let t:gdbmi_breakpoints_sign_ids = []
+  " 'file:line' -> breakpoint number, kept up to date by the remote plugin
+  let t:gdbmi_breakpoints = {}
+  " 'kind:start' -> page of Denite candidates, see gdbmi#locations()
+  let t:gdbmi_location_pages = {}
   call gdbmi#util#sign_init()
 endfunction
 
@@ -134,10 +141,7 @@ endfunction
 
 function! gdbmi#util#jump_frame(file, line) abort
   if !exists('t:gdbmi_channel_id') | return | endif
-  if !filereadable(a:file)
-    call gdbmi#util#clear_cursor_sign()
-    return
-  endif
+  " a:file has been resolved to an existing local path by the remote plugin
   let t:gdbmi_win_current_buf = gdbmi#util#jump(a:file, a:line)
   call gdbmi#util#set_cursor_sign(a:file, a:line)
 endfunction
@@ -162,27 +166,64 @@ function! gdbmi#util#clear_cursor_sign() abort
   endif
 endfunction
 
-function! gdbmi#util#set_breakpoint_sign(id, file, line) abort
-  let l:target_buf = bufnr(a:file, 1)
-  let l:sid = 5000 + a:id
-  call add(t:gdbmi_breakpoints_sign_ids, l:sid)
-  call sign_place(l:sid, t:gdbmi_buf_name, 'GdbmiBreakpoint'.t:gdbmi_buf_name, a:file, {'lnum': a:line})
+" The tab of session a:name, 0 once it is gone. Updates from the remote
+" plugin arrive asynchronously, when any tab may be current.
+function! gdbmi#util#session_tab(name) abort
+  for l:tab in range(1, tabpagenr('$'))
+    if gettabvar(l:tab, 'gdbmi_buf_name') ==# a:name
+      return l:tab
+    endif
+  endfor
+  return 0
 endfunction
 
-function! gdbmi#util#del_breakpoint_sign(id) abort
-  let l:sid = 5000 + a:id
-  let l:idx = index(t:gdbmi_breakpoints_sign_ids, l:sid)
-  if l:idx >= 0
-    call remove(t:gdbmi_breakpoints_sign_ids, l:idx)
-    call sign_unplace(t:gdbmi_buf_name, {'id': l:sid})
-  endif
+function! gdbmi#util#set_breakpoint_signs(name, signs) abort
+  if !gdbmi#util#session_tab(a:name) | return | endif
+  let l:group = a:name.'_breakpoint'
+  let l:sign = 'GdbmiBreakpoint'.a:name
+  let l:bufs = {}
+  let l:list = []
+  for [l:id, l:file, l:line] in a:signs
+    if !has_key(l:bufs, l:file)
+      let l:bufs[l:file] = bufadd(l:file)
+    endif
+    call add(l:list, {'id': l:id, 'group': l:group, 'name': l:sign,
+          \ 'buffer': l:bufs[l:file], 'lnum': l:line})
+  endfor
+  call sign_placelist(l:list)
+endfunction
+
+function! gdbmi#util#del_breakpoint_signs(name, ids) abort
+  if !gdbmi#util#session_tab(a:name) | return | endif
+  let l:group = a:name.'_breakpoint'
+  call sign_unplacelist(map(copy(a:ids), {_, id -> {'id': id, 'group': l:group}}))
 endfunction
 
 function! gdbmi#util#clear_breakpoint_sign() abort
-  for id in t:gdbmi_breakpoints_sign_ids
-    call sign_unplace(t:gdbmi_buf_name, {'id': id})
+  call sign_unplace(t:gdbmi_buf_name.'_breakpoint')
+endfunction
+
+function! gdbmi#util#update_breakpoint_map(name, updates) abort
+  let l:tab = gdbmi#util#session_tab(a:name)
+  if !l:tab | return | endif
+  " the dict is shared with the tab variable
+  let l:breakpoints = gettabvar(l:tab, 'gdbmi_breakpoints')
+  for [l:key, l:number] in a:updates
+    if empty(l:number)
+      if has_key(l:breakpoints, l:key)
+        call remove(l:breakpoints, l:key)
+      endif
+    else
+      let l:breakpoints[l:key] = l:number
+    endif
   endfor
-  let t:gdbmi_breakpoints_sign_ids = []
+endfunction
+
+function! gdbmi#util#set_location_page(name, kind, start, page) abort
+  let l:tab = gdbmi#util#session_tab(a:name)
+  if !l:tab | return | endif
+  let l:pages = gettabvar(l:tab, 'gdbmi_location_pages')
+  let l:pages[a:kind.':'.a:start] = a:page
 endfunction
 
 function! gdbmi#util#get_selection(...) abort
@@ -7,4 +7,13 @@ let g:gdbmi_delete_after_quit = get(g:, 'gdbmi_delete_after_quit', 0)
 let g:gdbmi_disable_autoread = get(g:, 'gdbmi_disable_autoread', 1)
 let g:gdbmi_use_yarp = get(g:, 'gdbmi_use_yarp', 0)
 let g:gdbmi_run_commands = get(g:, 'gdbmi_run_commands', [])
+let g:gdbmi_parser = get(g:, 'gdbmi_parser', 'scan')
+let g:gdbmi_display_history = get(g:, 'gdbmi_display_history', 1000)
+let g:gdbmi_display_settle_ms = get(g:, 'gdbmi_display_settle_ms', 50)
 
+let g:gdbmi_path_substitutions = get(g:, 'gdbmi_path_substitutions', [])
+let g:gdbmi_record_dir = get(g:, 'gdbmi_record_dir', '')
+let g:gdbmi_symbol_dir = get(g:, 'gdbmi_symbol_dir', (has('nvim') ? stdpath('cache') : expand('~/.vim')).'/gdbmi/symbols')
+let g:gdbmi_breakpoint_dir = get(g:, 'gdbmi_breakpoint_dir', (has('nvim') ? stdpath('data') : expand('~/.vim')).'/gdbmi/breakpoints')
+let g:gdbmi_log_level = get(g:, 'gdbmi_log_level', 'warning')
+let g:gdbmi_log_file = get(g:, 'gdbmi_log_file', '')
@@ -1,13 +1,12 @@
-import os
-from pathlib import Path
-
 from pynvim import Nvim
-from pynvim.api import Buffer
 
 from denite.base.source import Base
 from denite.kind.file import Kind as FileKind
 from denite.util import UserContext, Candidates
 
+# candidates asked from the session per gather
+PAGE = 2000
+
 
 class Source(Base):
     def __init__(self, vim: Nvim) -> None:
@@ -17,26 +16,32 @@ class Source(Base):
         self.kind = BreakpointKind(vim)
 
     def on_init(self, context: UserContext) -> None:
-        self.pwd = self.vim.funcs.getcwd()
-        self.locations = self.vim.vars["gdbmi_jump_locations"]
-
-    def gather_candidates(self, context: UserContext):
-        return [self._convert(e) for e in self.locations]
-
-    def _convert(self, element):
-        try:
-            relpath = Path(element["filename"]).relative_to(self.pwd).as_posix()
-        except ValueError:
-            relpath = os.path.relpath(element["filename"], self.pwd)
-            relpath = min([relpath, element["filename"]], key=len)
-
-        candidate = {
-            "word": element["text"],
-            "abbr": f'{relpath[-35:]:<35.35} [{element["lnum"]:>10}] {element["number"]}: {element["text"]}',
-            "action__path": element["filename"],
-            "action__line": element["lnum"],
-        }
-        return candidate
+        # :Denite gdbmi-locations:{kind}, the breakpoint sites by default
+        context["__kind"] = context["args"][0] if context["args"] else "breakpoints"
+        context["__cwd"] = self.vim.funcs.getcwd()
+        context["__offset"] = 0
+        context["__requested"] = False
+
+    def gather_candidates(self, context: UserContext) -> Candidates:
+        # the session formats them a page at a time, see gdbmi_interface/locations.py,
+        # and sends each page back without blocking the editor
+        if not context["__requested"]:
+            self._request(context)
+        page = self.vim.call("gdbmi#take_locations", context["__kind"], context["__offset"])
+        if page is None:
+            context["is_async"] = True
+            return []
+        context["__offset"] += len(page)
+        context["__requested"] = False
+        context["is_async"] = len(page) == PAGE
+        if context["is_async"]:
+            # the next page is formatted while this one is shown
+            self._request(context)
+        return page
+
+    def _request(self, context: UserContext) -> None:
+        self.vim.call("gdbmi#locations", context["__kind"], context["__cwd"], context["__offset"], PAGE)
+        context["__requested"] = True
 
 
 class BreakpointKind(FileKind):
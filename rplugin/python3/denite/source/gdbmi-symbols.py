@@ -0,0 +1,58 @@
+import os
+
+from pynvim import Nvim
+
+from denite.base.source import Base
+from denite.kind.file import Kind as FileKind
+from denite.util import UserContext, Candidates
+
+
+class Source(Base):
+    def __init__(self, vim: Nvim) -> None:
+        super().__init__(vim)
+
+        self.name = "gdbmi-symbols"
+        self.kind = FunctionKind(vim)
+        # the session's index does the matching, as the input changes
+        self.is_volatile = True
+
+    def on_init(self, context: UserContext) -> None:
+        self.pwd = self.vim.funcs.getcwd()
+
+    def gather_candidates(self, context: UserContext) -> Candidates:
+        rows = self.vim.call("gdbmi#symbols", context["input"], 1000)
+        return [self._convert(*row) for row in rows]
+
+    def _convert(self, name, path, line):
+        if path:
+            relpath = os.path.relpath(path, self.pwd)
+            relpath = min([relpath, path], key=len)
+            where = f"{relpath[-35:]:<35.35} [{line:>6}]"
+        else:
+            where = f"{'(no debug info)':<35} {'':8}"
+        candidate = {
+            "word": name,
+            "abbr": f"{where} {name}",
+            "action__function": name,
+        }
+        if path:
+            candidate["action__path"] = path
+            candidate["action__line"] = line
+        return candidate
+
+
+class FunctionKind(FileKind):
+    def __init__(self, vim: Nvim) -> None:
+        super().__init__(vim)
+
+        self.name = "gdbmi-function"
+        self.default_action = "break"
+
+    def action_break(self, context: UserContext):
+        for target in context["targets"]:
+            self.vim.call("gdbmi#break_expr", target["action__function"])
+
+    def action_jump(self, context: UserContext):
+        target = context["targets"][0]
+        if "action__path" in target:
+            self.vim.call("gdbmi#util#jump", target["action__path"], target["action__line"])
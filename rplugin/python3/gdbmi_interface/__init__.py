@@ -24,15 +24,7 @@ if hasattr(vim, 'plugin'):
 
         @vim.function('_gdbmi_start', sync=True)
         def gdbmi_start(self, args):
-            self.rplugin.start(args)
-
-        @vim.rpc_export('gdbmi_getslave', sync=True)
-        def gdbmi_getslave(self, args):
-            return self.rplugin.getSlave(args)
-
-        @vim.rpc_export('gdbmi_breaktoggle', sync=True)
-        def breakswitch(self, args):
-            return self.rplugin.breakswitch(args)
+            return self.rplugin.start(args)
 
         @vim.rpc_export('gdbmi_exec', sync=False)
         def exec(self, args):
@@ -42,13 +34,33 @@ if hasattr(vim, 'plugin'):
         def display(self, args):
             self.rplugin.display(args)
 
+        @vim.rpc_export('gdbmi_display_history', sync=False)
+        def display_history(self, args):
+            self.rplugin.display_history(args)
+
+        @vim.rpc_export('gdbmi_display_expand', sync=False)
+        def display_expand(self, args):
+            self.rplugin.display_expand(args)
+
+        @vim.rpc_export('gdbmi_startup', sync=False)
+        def startup(self, args):
+            self.rplugin.startup(args)
+
+        @vim.rpc_export('gdbmi_symbols', sync=True)
+        def symbols(self, args):
+            return self.rplugin.symbols(args)
+
+        @vim.rpc_export('gdbmi_stats', sync=False)
+        def stats(self, args):
+            self.rplugin.stats(args)
+
         @vim.rpc_export('gdbmi_stop', sync=False)
         def stop(self, args):
             self.rplugin.stop(args)
 
-        @vim.rpc_export('gdbmi_getbreakpoints', sync=True)
-        def breakpoints(self, args):
-            return self.rplugin.breakpoints(args)
+        @vim.rpc_export('gdbmi_locations', sync=False)
+        def locations(self, args):
+            self.rplugin.locations(args)
 
 elif find_spec('yarp'):
 
@@ -57,15 +69,30 @@ elif find_spec('yarp'):
     def _gdbmi_start(args):
         return gdbmi.start(args)
 
-    def gdbmi_breaktoggle(args):
-        return gdbmi.breakswitch(args)
-
     def gdbmi_exec(args):
         gdbmi.exec(args)
 
     def gdbmi_display(args):
         gdbmi.display(args)
 
+    def gdbmi_display_history(args):
+        gdbmi.display_history(args)
+
+    def gdbmi_display_expand(args):
+        gdbmi.display_expand(args)
+
     def gdbmi_stop(args):
         return gdbmi.stop(args)
 
+    def gdbmi_stats(args):
+        gdbmi.stats(args)
+
+    def gdbmi_startup(args):
+        gdbmi.startup(args)
+
+    def gdbmi_symbols(args):
+        return gdbmi.symbols(args)
+
+    def gdbmi_locations(args):
+        gdbmi.locations(args)
+
@@ -1,6 +1,6 @@
-
 # encoding: utf-8
 
+from .parse import GDBMIError
 from .session import Session
 
-__all__ = ["Session"]
+__all__ = ["Session", "GDBMIError"]
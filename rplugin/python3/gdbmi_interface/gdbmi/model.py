@@ -0,0 +1,252 @@
+# encoding: utf-8
+
+"""Compact objects for the state a Session keeps around.
+
+Parsed records are plain dicts that repeat every key and path string; the
+classes here keep only the fields the plugin uses, in __slots__, with
+interned strings so that thousands of breakpoints or libraries share one
+copy of each file name.
+"""
+
+from sys import intern
+
+
+def _str(value):
+    return intern(value) if value is not None else None
+
+
+def _int(value, base=10):
+    return int(value, base) if value is not None else None
+
+
+def _strings(values):
+    return tuple(intern(v) for v in values) if values else ()
+
+
+class _Compact:
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Frame(_Compact):
+    __slots__ = ("level", "addr", "func", "file", "fullname", "line")
+
+    def __init__(self, level=None, addr=None, func=None, file=None, fullname=None, line=None):
+        self.level = level
+        self.addr = addr
+        self.func = func
+        self.file = file
+        self.fullname = fullname
+        self.line = line
+
+    @classmethod
+    def from_mi(cls, info):
+        return cls(
+            _int(info.get("level")),
+            info.get("addr"),
+            _str(info.get("func")),
+            _str(info.get("file")),
+            _str(info.get("fullname")),
+            _int(info.get("line")),
+        )
+
+
+class BreakpointLocation(_Compact):
+    __slots__ = ("number", "enabled", "addr", "func", "fullname", "line", "thread_groups")
+
+    def __init__(self, number, enabled=True, addr=None, func=None, fullname=None, line=None,
+                 thread_groups=()):
+        self.number = number
+        self.enabled = enabled
+        self.addr = addr
+        self.func = func
+        self.fullname = fullname
+        self.line = line
+        self.thread_groups = thread_groups
+
+    @classmethod
+    def from_mi(cls, info):
+        return cls(
+            intern(info["number"]),
+            info.get("enabled", "y") == "y",
+            info.get("addr"),
+            _str(info.get("func") or info.get("at")),
+            _str(info.get("fullname")),
+            _int(info.get("line")),
+            _strings(info.get("thread-groups")),
+        )
+
+
+class Breakpoint(_Compact):
+    """A breakpoint, dprintf or watchpoint.
+
+    A breakpoint with a single location carries it in fullname/line; one
+    with addr="<MULTIPLE>" has them in locations instead.
+    """
+
+    __slots__ = (
+        "number", "type", "disp", "enabled", "addr", "func", "fullname", "line",
+        "times", "original_location", "what", "cond", "ignore", "script",
+        "thread_groups", "locations",
+    )
+
+    def __init__(self, number, type="breakpoint", disp="keep", enabled=True, addr=None,
+                 func=None, fullname=None, line=None, times=0, original_location=None,
+                 what=None, cond=None, ignore=0, script=(), thread_groups=(), locations=()):
+        self.number = number
+        self.type = type
+        self.disp = disp
+        self.enabled = enabled
+        self.addr = addr
+        self.func = func
+        self.fullname = fullname
+        self.line = line
+        self.times = times
+        self.original_location = original_location
+        self.what = what
+        self.cond = cond
+        self.ignore = ignore
+        self.script = script
+        self.thread_groups = thread_groups
+        self.locations = locations
+
+    @classmethod
+    def from_mi(cls, bkpt):
+        """Build from the bkpt value of a breakpoint record.
+
+        MI2, GDB before 9, sends the locations of a multi-location breakpoint
+        as extra tuples after bkpt, which the parser folds into a list. The
+        script of commands comes as a list, or as a tuple of strings in MI3,
+        which the parser also returns as a list.
+        """
+        if isinstance(bkpt, list):
+            info, locations = bkpt[0], bkpt[1:]
+        else:
+            info, locations = bkpt, bkpt.get("locations", ())
+
+        script = info.get("script")
+        return cls(
+            intern(info["number"]),
+            intern(info.get("type", "breakpoint")),
+            intern(info.get("disp", "keep")),
+            info.get("enabled", "y") == "y",
+            info.get("addr"),
+            _str(info.get("func")),
+            _str(info.get("fullname")),
+            _int(info.get("line")),
+            int(info.get("times", 0)),
+            info.get("original-location"),
+            info.get("what"),
+            info.get("cond"),
+            int(info.get("ignore", 0)),
+            tuple(script) if script else (),
+            _strings(info.get("thread-groups")),
+            tuple(BreakpointLocation.from_mi(loc) for loc in locations),
+        )
+
+    @property
+    def multiple(self):
+        return self.addr == "<MULTIPLE>"
+
+
+class Library(_Compact):
+    __slots__ = ("id", "target_name", "host_name", "symbols_loaded", "thread_group", "ranges")
+
+    def __init__(self, id, target_name=None, host_name=None, symbols_loaded=False,
+                 thread_group=None, ranges=()):
+        self.id = id
+        self.target_name = target_name
+        self.host_name = host_name
+        self.symbols_loaded = symbols_loaded
+        self.thread_group = thread_group
+        self.ranges = ranges
+
+    @classmethod
+    def from_mi(cls, info):
+        return cls(
+            intern(info["id"]),
+            _str(info.get("target-name")),
+            _str(info.get("host-name")),
+            info.get("symbols-loaded") == "1",
+            _str(info.get("thread-group")),
+            tuple((_int(r["from"], 16), _int(r["to"], 16)) for r in info.get("ranges", ())),
+        )
+
+
+class ThreadGroup(_Compact):
+    __slots__ = ("id", "pid", "threads", "libraries")
+
+    def __init__(self, id, pid=None):
+        self.id = id
+        self.pid = pid
+        self.threads = set()
+        self.libraries = {}
+
+
+class BreakpointStore:
+    """Breakpoints by number, with a listing of their located sites.
+
+    The session indexes the sites by the local file and line they are
+    shown on, see Session._place_signs.
+    """
+
+    def __init__(self):
+        self._breakpoints = {}
+        self._listing = None
+
+    def __len__(self):
+        return len(self._breakpoints)
+
+    def __iter__(self):
+        return iter(self._breakpoints.values())
+
+    def __contains__(self, number):
+        return self.get(number) is not None
+
+    def get(self, number):
+        """The breakpoint numbered number, or its location for "N.M"."""
+        parent, dot, _ = number.partition(".")
+        bkpt = self._breakpoints.get(parent)
+        if bkpt is None or not dot:
+            return bkpt
+        for loc in bkpt.locations:
+            if loc.number == number:
+                return loc
+        return None
+
+    @staticmethod
+    def sites(bkpt):
+        """The breakpoint's locations if it has several, else the breakpoint."""
+        return bkpt.locations if bkpt.multiple else (bkpt,)
+
+    def add(self, bkpt):
+        """Add or replace a breakpoint; returns the one it replaced."""
+        self._listing = None
+        old = self._breakpoints.get(bkpt.number)
+        # a replaced breakpoint keeps its place in the listing
+        self._breakpoints[bkpt.number] = bkpt
+        return old
+
+    def remove(self, number):
+        bkpt = self._breakpoints.pop(number, None)
+        if bkpt is not None:
+            self._listing = None
+        return bkpt
+
+    def listing(self):
+        """Located sites of all breakpoints, as quickfix-like dicts.
+
+        The list is rebuilt only after the table changed.
+        """
+        if self._listing is None:
+            self._listing = [
+                {"number": site.number, "filename": site.fullname, "lnum": site.line, "text": site.func}
+                for bkpt in self._breakpoints.values()
+                if bkpt.type == "breakpoint"
+                for site in self.sites(bkpt)
+                if site.fullname
+            ]
+        return self._listing
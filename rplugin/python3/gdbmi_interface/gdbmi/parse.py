@@ -1,6 +1,8 @@
 # encoding: utf-8
 
 import re
+import sys
+import functools
 import collections
 from ast import literal_eval
 import logging
@@ -68,12 +70,22 @@ class ParseError(Exception):
     pass
 
 
+class GDBMIError(Exception):
+    """An MI command was answered with ^error."""
+
+    def __init__(self, cmd, msg, record):
+        super().__init__(f"{cmd}: {msg}")
+        self.cmd = cmd
+        self.msg = msg
+        self.record = record
+
+
 class GDBOutputParse:
     def __init__(self):
         self.debug, self.info, self.warn, self.error = (
             logger.debug,
             logger.info,
-            logger.warn,
+            logger.warning,
             logger.error,
         )
         self.GDB_PROMPT = object()
@@ -157,6 +169,16 @@ class GDBOutputParse:
         if self._accept("R_TUPLE"):
             return results
 
+        if self._accept("CONST"):
+            # MI3 sends breakpoint commands as script={"cmd",...}
+            values = [self.tok.value]
+            while not self._accept("R_TUPLE"):
+                if self._accept("COMMA") and self._accept("CONST"):
+                    values.append(self.tok.value)
+                else:
+                    raise ParseError(self.tok)
+            return values
+
         var, value = self.result()
         results[var] = value
 
@@ -241,7 +263,7 @@ class GDBOutputParse:
 
     def _advance(self):
         self.tok, self.nexttok = self.nexttok, next(self.tokens, None)
-        self.debug(repr(self.tok))
+        self.debug("%r", self.tok)
 
     def _accept(self, toktype):
         if self.nexttok and self.nexttok.type == toktype:
@@ -254,10 +276,361 @@ class GDBOutputParse:
         return self.nexttok.type == toktype
 
 
+_RESULT_CLASSES = frozenset(('done', 'running', 'connected', 'error', 'exit'))
+_ASYNC_CLASSES = {'*': 'EXEC_CLASS', '+': 'STATUS_CLASS', '=': 'NOTIFY_CLASS'}
+_STREAM_CLASSES = {'~': 'CONSOLE_OUTPUT', '@': 'TARGET_OUTPUT', '&': 'LOG_OUTPUT'}
+_DIGITS = frozenset('0123456789')
+
+_C_ESCAPES = {
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+    '\\': '\\', '"': '"', "'": "'", '\n': '',
+}
+_c_escape_pat = re.compile(r'\\(?:([0-7]{1,3})|x([0-9a-fA-F]{2})|(.))', re.S)
+
+
+def _c_unescape_one(m):
+    octal, hexa, char = m.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hexa is not None:
+        return chr(int(hexa, 16))
+    return _C_ESCAPES.get(char, m.group(0))
+
+
+def unescape_c_string(value):
+    """Decode the body of an MI c-string, as literal_eval would have."""
+    if '\\' not in value:
+        return value
+    return _c_escape_pat.sub(_c_unescape_one, value)
+
+
+def quote_c_string(value):
+    """Quote a command argument as an MI c-string."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+_skip_pat = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|([\[{])|([\]}])')
+
+
+class LazyTuple(dict):
+    """A tuple value that is parsed on first access.
+
+    Until then it only holds the record text and the offset after its '{'.
+    Materialize it (any read does) before handing it to msgpack, which
+    reads dict storage directly.
+    """
+
+    __slots__ = ('_source',)
+
+    def __init__(self, parser, text, pos):
+        self._source = (parser, text, pos)
+
+    def _load(self):
+        parser, text, pos = self._source
+        self._source = None
+        parser._tuple(text, pos, self)
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+
+class LazyResults(LazyTuple):
+    """The results of a record, parsed on first access, see LazyTuple."""
+
+    __slots__ = ()
+
+    def __init__(self, parser, text, pos, end):
+        self._source = (parser, text, pos, end)
+
+    def _load(self):
+        parser, text, pos, end = self._source
+        self._source = None
+        parser._results(text, pos, end, self)
+
+
+class LazyList(list):
+    """A list value that is parsed on first access, see LazyTuple."""
+
+    __slots__ = ('_source',)
+
+    def __init__(self, parser, text, pos):
+        self._source = (parser, text, pos)
+
+    def _load(self):
+        parser, text, pos = self._source
+        self._source = None
+        parser._list(text, pos, self)
+
+    def __reduce__(self):
+        return list, (list(iter(self)),)
+
+
+def _loading(base, name):
+    method = getattr(base, name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._source is not None:
+            self._load()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+for _name in (
+    '__getitem__', '__setitem__', '__delitem__', '__contains__', '__iter__', '__len__',
+    '__repr__', '__eq__', '__ne__', '__or__', '__ior__', '__reversed__',
+    'get', 'keys', 'values', 'items', 'pop', 'popitem', 'setdefault', 'update', 'copy',
+):
+    setattr(LazyTuple, _name, _loading(dict, _name))
+
+for _name in (
+    '__getitem__', '__setitem__', '__delitem__', '__contains__', '__iter__', '__len__',
+    '__repr__', '__eq__', '__ne__', '__add__', '__iadd__', '__mul__', '__reversed__',
+    'append', 'extend', 'insert', 'remove', 'pop', 'index', 'count', 'copy', 'sort', 'reverse',
+):
+    setattr(LazyList, _name, _loading(list, _name))
+
+
+class GDBOutputScanner:
+    """Single pass MI parser.
+
+    Scans the record with str.find and index arithmetic instead of a token
+    stream, and returns exactly what GDBOutputParse returns.
+
+    With lazy=True, the results of a record and the tuple and list values
+    in it come back as LazyResults, LazyTuple and LazyList: the scanner
+    only reads the record header and skips over value spans, and parses
+    them one level at a time when they are first read. Malformed results
+    then raise ParseError on that first read instead of in parse().
+    """
+
+    def __init__(self, lazy=False):
+        self.GDB_PROMPT = object()
+        self.lazy = lazy
+        if lazy:
+            self._value = self._lazy_value
+
+    def parse(self, text):
+        end = len(text)
+        while end and text[end - 1] in '\r\n':
+            end -= 1
+
+        if text.startswith('(gdb)'):
+            return None, self.GDB_PROMPT
+
+        pos = 0
+        while pos < end and text[pos] in _DIGITS:
+            pos += 1
+        token = text[:pos] if pos else None
+        if pos == end:
+            return token, None
+
+        try:
+            return token, self._record(text, pos, end)
+        except IndexError:
+            raise ParseError(repr(text))
+
+    def _record(self, text, pos, end):
+        c = text[pos]
+        if c == '^':
+            comma = text.find(',', pos, end)
+            if comma < 0:
+                comma = end
+            result_class = text[pos + 1:comma]
+            if result_class not in _RESULT_CLASSES:
+                return None
+            return ResultRecord('ResultRecord', result_class, self._record_results(text, comma, end))
+
+        async_class = _ASYNC_CLASSES.get(c)
+        if async_class is not None:
+            comma = text.find(',', pos, end)
+            if comma < 0:
+                comma = end
+            name = text[pos + 1:comma]
+            return AsyncRecord('AsyncRecord', async_class, name, self._record_results(text, comma, end))
+
+        stream_class = _STREAM_CLASSES.get(c)
+        if stream_class is not None and pos == 0:
+            if text[1] != '"' or text[end - 1] != '"' or end < 3:
+                raise ParseError(repr(text))
+            return StreamRecord('StreamRecord', stream_class, unescape_c_string(text[2:end - 1]))
+
+        return None
+
+    def _record_results(self, text, pos, end):
+        if self.lazy and pos < end:
+            return LazyResults(self, text, pos, end)
+        return self._results(text, pos, end)
+
+    def _results(self, text, pos, end, results=None):
+        if results is None:
+            results = {}
+        while pos < end and text[pos] == ',':
+            var, value, pos = self._result(text, pos + 1)
+            if var:
+                results[var] = value
+            elif len(results) == 1:
+                k, v = results.popitem()
+                if isinstance(v, list):
+                    v.append(value)
+                    results[k] = v
+                else:
+                    results[k] = [v, value]
+            else:
+                raise ParseError(repr(value))
+
+        if pos != end:
+            raise ParseError(repr(text[pos:end]))
+        return results
+
+    def _result(self, text, pos):
+        if text[pos] == '{':
+            value, pos = self._tuple(text, pos + 1)
+            return None, value, pos
+
+        eq = text.find('=', pos)
+        if eq < 0:
+            raise ParseError(repr(text[pos:]))
+        var = sys.intern(text[pos:eq])
+        value, pos = self._value(text, eq + 1)
+        return var, value, pos
+
+    def _value(self, text, pos):
+        c = text[pos]
+        if c == '"':
+            close = self._string_end(text, pos + 1)
+            return text[pos + 1:close], close + 1
+        elif c == '{':
+            return self._tuple(text, pos + 1)
+        elif c == '[':
+            return self._list(text, pos + 1)
+        else:
+            raise ParseError(repr(text[pos:]))
+
+    def _lazy_value(self, text, pos):
+        c = text[pos]
+        if c == '"':
+            close = self._string_end(text, pos + 1)
+            return text[pos + 1:close], close + 1
+        elif c == '{':
+            if text[pos + 1] == '"':
+                return self._string_tuple(text, pos + 1)
+            return LazyTuple(self, text, pos + 1), self._skip(text, pos + 1)
+        elif c == '[':
+            return LazyList(self, text, pos + 1), self._skip(text, pos + 1)
+        else:
+            raise ParseError(repr(text[pos:]))
+
+    @staticmethod
+    def _skip(text, pos):
+        depth = 1
+        for m in _skip_pat.finditer(text, pos):
+            if m.lastindex == 1:
+                depth += 1
+            elif m.lastindex == 2:
+                depth -= 1
+                if not depth:
+                    return m.end()
+        raise ParseError(repr(text[pos:]))
+
+    @staticmethod
+    def _string_end(text, pos):
+        find = text.find
+        while True:
+            quote = find('"', pos)
+            if quote < 0:
+                raise ParseError(repr(text[pos:]))
+            # the opening quote stops this walk
+            back = quote - 1
+            while text[back] == '\\':
+                back -= 1
+            if (quote - back) % 2:
+                return quote
+            pos = quote + 1
+
+    def _tuple(self, text, pos, results=None):
+        if results is None:
+            if text[pos] == '"':
+                return self._string_tuple(text, pos)
+            results = {}
+        if text[pos] == '}':
+            return results, pos + 1
+
+        setitem = dict.__setitem__
+        while True:
+            var, value, pos = self._result(text, pos)
+            setitem(results, var, value)
+            c = text[pos]
+            if c == '}':
+                return results, pos + 1
+            elif c != ',':
+                raise ParseError(repr(text[pos:]))
+            pos += 1
+
+    def _string_tuple(self, text, pos):
+        """A tuple of bare strings, which MI3 sends for breakpoint commands,
+        as a list like the MI2 form script=[...]."""
+        values = []
+        while True:
+            if text[pos] != '"':
+                raise ParseError(repr(text[pos:]))
+            close = self._string_end(text, pos + 1)
+            values.append(text[pos + 1:close])
+            pos = close + 1
+            c = text[pos]
+            if c == '}':
+                return values, pos + 1
+            elif c != ',':
+                raise ParseError(repr(text[pos:]))
+            pos += 1
+
+    def _list(self, text, pos, values=None):
+        if values is None:
+            values = []
+        c = text[pos]
+        if c == ']':
+            return values, pos + 1
+
+        if c in '"{[':
+            item = self._value
+        else:
+            def item(text, pos):
+                _, value, pos = self._result(text, pos)
+                return value, pos
+
+        append = list.append
+        while True:
+            value, pos = item(text, pos)
+            append(values, value)
+            c = text[pos]
+            if c == ']':
+                return values, pos + 1
+            elif c != ',':
+                raise ParseError(repr(text[pos:]))
+            pos += 1
+
+
+PARSERS = {
+    'regex': GDBOutputParse,
+    'scan': GDBOutputScanner,
+    'lazy': functools.partial(GDBOutputScanner, lazy=True),
+}
+
+
+def make_parser(name='scan'):
+    try:
+        return PARSERS[name]()
+    except KeyError:
+        raise ValueError(f'unknown parser {name!r}, expected one of {sorted(PARSERS)}')
+
+
 def test(output):
     parser = GDBOutputParse()
     result = parser.parse((output))
     print(result)
+    assert GDBOutputScanner().parse(output) == result, output
+    assert GDBOutputScanner(lazy=True).parse(output) == result, output
     return result
 
 
@@ -309,9 +682,16 @@ if __name__ == "__main__":
         + r'{number="2.2",enabled="y",addr="0x00000000004011d6",func="seqsum(long, long)",file="ab.cpp",fullname="gdbmi.nvim/test/ab.cpp",line="21",thread-groups=["i1"]}]}'
         + '\r\n'
     )
+    test6 = (
+        r'1^done,bkpt={number="3",type="dprintf",disp="keep",enabled="y",addr="0x0000000000401136",'
+        + r'func="foo",file="ab.c",fullname="gdbmi.nvim/test/ab.c",line="4",thread-groups=["i1"],'
+        + r'times="0",script={"printf \"At foo %d\\n\",x","silent"},original-location="foo"}'
+        + '\n'
+    )
     #  main(sys.argv[1])
     test(test1)
     test(test2)
     test(test3)
     test(test4)
     test(test5)
+    test(test6)
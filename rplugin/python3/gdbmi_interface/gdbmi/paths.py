@@ -0,0 +1,67 @@
+# encoding: utf-8
+
+"""Map the source paths GDB reports to files that exist locally.
+
+Binaries built on another machine or in a container report fullnames that
+do not exist here; substitution rules rewrite their prefixes, like GDB's
+"set substitute-path". Results are cached, so stepping through the same
+files does not stat them again.
+"""
+
+import os
+import time
+
+from gdbmi_interface.log import getLogger
+
+logger = getLogger(__name__)
+
+
+class PathResolver:
+    """Resolves GDB fullnames through prefix rules, caching the outcome.
+
+    A found path is kept until invalidate(); a missing one is retried after
+    negative_ttl seconds, since the file may be checked out or generated
+    while debugging.
+    """
+
+    def __init__(self, rules=(), negative_ttl=5.0):
+        self.rules = [(os.path.normpath(src), os.path.expanduser(dst)) for src, dst in rules]
+        self.negative_ttl = negative_ttl
+        # fullname -> resolved path
+        self._found = {}
+        # fullname -> time.monotonic() of the failed lookup
+        self._missing = {}
+
+    def candidates(self, fullname):
+        for src, dst in self.rules:
+            if fullname == src or fullname.startswith(src + os.sep):
+                yield dst + fullname[len(src):]
+        yield fullname
+
+    def resolve(self, fullname):
+        """The local path of fullname, or None if it does not exist."""
+        if not fullname:
+            return None
+        path = self._found.get(fullname)
+        if path is not None:
+            return path
+        missed = self._missing.get(fullname)
+        if missed is not None and time.monotonic() - missed < self.negative_ttl:
+            return None
+
+        for path in self.candidates(fullname):
+            if os.path.isfile(path):
+                self._missing.pop(fullname, None)
+                self._found[fullname] = path
+                return path
+        logger.debug("no local source for %s", fullname)
+        self._missing[fullname] = time.monotonic()
+        return None
+
+    def invalidate(self, fullname=None):
+        if fullname is None:
+            self._found.clear()
+            self._missing.clear()
+        else:
+            self._found.pop(fullname, None)
+            self._missing.pop(fullname, None)
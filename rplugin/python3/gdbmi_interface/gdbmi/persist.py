@@ -0,0 +1,131 @@
+# encoding: utf-8
+
+"""Breakpoints saved per project and executable, for the next launch.
+
+A file holds one JSON object per line: a header naming the project and the
+executable, then one entry per breakpoint with only the fields that differ
+from an enabled, unconditional breakpoint. Watchpoints are not saved, they
+belong to the frame they were set in.
+"""
+
+import os
+import json
+import hashlib
+
+from gdbmi_interface.gdbmi.parse import quote_c_string, unescape_c_string
+
+VERSION = 1
+SAVED_TYPES = ("breakpoint", "hw breakpoint", "dprintf")
+
+
+def breakpoint_file(directory, project, executable):
+    digest = hashlib.sha1(f"{project}\0{executable}".encode("utf8")).hexdigest()[:16]
+    name = os.path.basename(executable) if executable else "none"
+    return os.path.join(directory, f"{name}-{digest}.jsonl")
+
+
+def entry(bkpt):
+    """The saved form of bkpt, or None if it can't be inserted again."""
+    if bkpt.type not in SAVED_TYPES or not bkpt.original_location:
+        return None
+    saved = {"location": unescape_c_string(bkpt.original_location)}
+    if bkpt.type != "breakpoint":
+        saved["type"] = bkpt.type
+    if not bkpt.enabled:
+        saved["enabled"] = False
+    if bkpt.disp == "del":
+        saved["temporary"] = True
+    if bkpt.cond:
+        saved["cond"] = unescape_c_string(bkpt.cond)
+    if bkpt.ignore:
+        saved["ignore"] = bkpt.ignore
+    if bkpt.type == "dprintf":
+        for line in bkpt.script:
+            line = unescape_c_string(line)
+            if line.startswith("printf "):
+                saved["printf"] = line[len("printf "):]
+                break
+        else:
+            return None
+    return saved
+
+
+def save(path, project, executable, bkpts):
+    """Write the saved form of bkpts to path, replacing it atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = [json.dumps({"version": VERSION, "project": project, "executable": executable})]
+    for bkpt in bkpts:
+        saved = entry(bkpt)
+        if saved is not None:
+            lines.append(json.dumps(saved, separators=(",", ":")))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+    return len(lines) - 1
+
+
+def load(path):
+    """The saved entries of path; none if it doesn't exist."""
+    try:
+        with open(path) as f:
+            header, *lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    except ValueError:
+        # empty file
+        return []
+    if json.loads(header).get("version") != VERSION:
+        raise ValueError(f"{path}: unknown version")
+    return [json.loads(line) for line in lines if line]
+
+
+def _split_printf(text):
+    """'"fmt",a,f(b,c)' -> ['"fmt"', 'a', 'f(b,c)']: split at top-level commas."""
+    args = []
+    depth = 0
+    quote = None
+    start = 0
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif c == "," and not depth:
+            args.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    args.append(text[start:].strip())
+    return args
+
+
+def insert_command(saved):
+    """The MI command that inserts a saved breakpoint again."""
+    options = []
+    if saved.get("temporary"):
+        options.append("-t")
+    if saved.get("type") == "hw breakpoint":
+        options.append("-h")
+    if not saved.get("enabled", True):
+        options.append("-d")
+    if saved.get("cond"):
+        options += ["-c", quote_c_string(saved["cond"])]
+    if saved.get("ignore"):
+        options += ["-i", str(saved["ignore"])]
+    # pending until the library that has it is loaded
+    options.append("-f")
+    location = quote_c_string(saved["location"])
+    if saved.get("type") == "dprintf":
+        # the format is already quoted, as it was typed
+        fmt, *args = _split_printf(saved["printf"])
+        return " ".join(["-dprintf-insert", *options, location, fmt, *map(quote_c_string, args)])
+    return " ".join(["-break-insert", *options, location])
@@ -1,107 +1,528 @@
 import os
 import fcntl
 import asyncio
+import collections
+from time import perf_counter
 
 from subprocess import Popen, PIPE
 
 from gdbmi_interface.gdbmi.parse import (
-    GDBOutputParse,
+    make_parser,
+    quote_c_string,
+    unescape_c_string,
     ParseError,
+    GDBMIError,
     ResultRecord,
     AsyncRecord,
     StreamRecord,
 )
+from gdbmi_interface.gdbmi.model import Frame, Breakpoint, BreakpointStore, Library, ThreadGroup
+from gdbmi_interface.gdbmi.paths import PathResolver
+from gdbmi_interface.gdbmi import persist, transcript
+from gdbmi_interface.gdbmi.symbols import SymbolIndex, index_file, index_key
+from gdbmi_interface.gdbmi.watch import WatchList
+from gdbmi_interface.locations import LocationList, RelativePaths
 from gdbmi_interface.log import getLogger, log_exceptions
+from gdbmi_interface.stats import Stats
 
 
 class Session(object):
-    def __init__(self, name, gdbmi_interface_fd, slave_path, ui):
+    def __init__(self, name, gdbmi_interface_fd, slave_path, ui, parser="scan", recent_commands=16,
+                 display_history=1000, settle_delay=0.05, path_substitutions=(), record=None,
+                 symbol_dir=None):
+        self.created = perf_counter()
         self.name = name
         self.slave_path = slave_path
         self.gdbmi_interface_fd = gdbmi_interface_fd
         self.ui = ui
 
         self.thread_groups = {}
-        self.breakpoints = {}
-
+        self.breakpoints = BreakpointStore()
+        self.paths = PathResolver(path_substitutions)
+        # breakpoint number -> {sign id: (file, line)} of the signs placed for it,
+        # and (file, line) -> {breakpoint number: None} of the placed signs
+        self._placed = {}
+        self._placed_at = {}
+        # where the breakpoints are saved, known once startup() found the executable
+        self.breakpoint_file = None
+        self._breakpoint_owner = None
+        self._save_timer = None
+        # kind -> LocationList served to the Denite source
+        self._location_lists = {}
+        self._relpaths = None
+        # path of the loaded executable, "" if none or to be looked up again,
+        # None until startup() asked
+        self.executable = None
+        self.symbol_dir = symbol_dir
+        self.symbol_index = None
+        self._symbol_task = None
+
+        # in-flight commands only; finished ones go to recent_commands
         self.commands = {}
+        self.recent_commands = collections.deque(maxlen=recent_commands)
+        self.command_counters = collections.Counter()
+        self.stats = Stats()
+        self._running_token = None
+        # (token, cmd, time requested) of the exec command being run, and
+        # ((cmd, args), time requested) of those waiting for it to stop
+        self._exec = None
+        self._exec_queue = collections.deque()
+        self.frame_level = 0
+        self._pending = {}
         self._callbacks = {}
-        self._display_exprs = {}
-
-        self.parser = GDBOutputParse()
+        self.watches = WatchList(self, ui, display_history)
+        self.stop_count = 0
+        # bumped on every *running and *stopped, queries of older ones are stale
+        self.generation = 0
+        self.settle_delay = settle_delay
+        self._display_timer = None
+
+        # tee of the raw pty traffic, see transcript.py
+        self.recorder = transcript.TranscriptWriter(record) if record else None
+        self.parser = make_parser(parser)
         self.token = 0
+        self._read_buffer = bytearray()
+        # commands not written yet, flushed once per loop tick
+        self._write_buffer = bytearray()
+        self._write_scheduled = False
+        self._writer = False
+        self._write_queue_max = 0
+        self._drain_waiters = []
         self.handlers = {
             "ResultRecord": self._handle_result,
             "AsyncRecord": self._handle_async,
             "StreamRecord": self._handle_stream,
         }
 
+        flags = fcntl.fcntl(self.gdbmi_interface_fd, fcntl.F_GETFL)
+        fcntl.fcntl(self.gdbmi_interface_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
         self.gdbmi = os.fdopen(self.gdbmi_interface_fd, mode="wb+", buffering=0)
-        loop = asyncio.get_event_loop()
-        loop.add_reader(self.gdbmi_interface_fd, self.read_task)
+        self.loop = asyncio.get_event_loop()
+        # set to the seconds since creation when GDB prints its first MI prompt
+        self.ready = self.loop.create_future()
+        self.loop.add_reader(self.gdbmi_interface_fd, self.read_task)
 
         logger = getLogger(__name__)
         self.debug, self.info, self.warn, self.error = (
             logger.debug,
             logger.info,
-            logger.warn,
+            logger.warning,
             logger.error,
         )
-        self.debug(f"Session launched {name} {gdbmi_interface_fd} {slave_path}")
+        self.debug("Session launched %s %d %s", name, gdbmi_interface_fd, slave_path)
 
     def _send(self, cmd, **kwargs):
         self.token += 1
-        self.commands[self.token] = {"cmd": cmd}
+        self.commands[self.token] = {"cmd": cmd, "time": perf_counter()}
         self.commands[self.token].update(kwargs)
+        self.command_counters["sent"] += 1
 
-        buf = f"{ self.token :04}{ cmd }\n"
-        self.gdbmi.write(buf.encode("utf8"))
-        self.debug(buf)
+        self._write_buffer += f"{ self.token :04}{ cmd }\n".encode("utf8")
+        if len(self._write_buffer) > self._write_queue_max:
+            self._write_queue_max = len(self._write_buffer)
+        if not self._write_scheduled and not self._writer:
+            self._write_scheduled = True
+            self.loop.call_soon(self._flush_writes)
+        self.debug("send %04d%s", self.token, cmd)
 
         return self.token
 
+    # pending bytes above which drain() waits
+    WRITE_HIGH_WATER = 1 << 16
+
+    def _flush_writes(self):
+        """Write what the pty takes; wait for it to be writable for the rest."""
+        self._write_scheduled = False
+        buf = self._write_buffer
+        if buf:
+            try:
+                written = os.write(self.gdbmi_interface_fd, buf)
+            except BlockingIOError:
+                written = 0
+            except OSError:
+                self.error("write to GDB failed, dropping %d bytes", len(buf), exc_info=True)
+                written = len(buf)
+            if written:
+                self.stats.count("pty writes")
+                self.stats.count("pty bytes written", written)
+                if self.recorder is not None:
+                    self.recorder.write(transcript.WRITE, bytes(buf[:written]))
+                del buf[:written]
+
+        if buf and not self._writer:
+            self.stats.count("pty write stalls")
+            self.loop.add_writer(self.gdbmi_interface_fd, self._flush_writes)
+            self._writer = True
+        elif not buf and self._writer:
+            self.loop.remove_writer(self.gdbmi_interface_fd)
+            self._writer = False
+
+        if len(buf) < self.WRITE_HIGH_WATER:
+            waiters, self._drain_waiters = self._drain_waiters, []
+            for future in waiters:
+                if not future.done():
+                    future.set_result(None)
+
+    async def drain(self):
+        """Wait until the pending writes are below WRITE_HIGH_WATER.
+
+        For callers sending commands in bulk without waiting for results.
+        """
+        if len(self._write_buffer) >= self.WRITE_HIGH_WATER:
+            self.stats.count("drain waits")
+            future = self.loop.create_future()
+            self._drain_waiters.append(future)
+            await future
+
+    async def request(self, cmd, timeout=None):
+        """Send an MI command and wait for its result record.
+
+        Any number of requests may be in flight at once. Raises GDBMIError
+        on ^error and asyncio.TimeoutError when no result arrives within
+        timeout seconds; a result that arrives later is dropped.
+        """
+        token, future = self._submit(cmd)
+        return await self._result(cmd, token, future, timeout)
+
+    def _submit(self, cmd):
+        future = self.loop.create_future()
+        token = self._send(cmd)
+        self._pending[token] = future
+        return token, future
+
+    async def _result(self, cmd, token, future, timeout=None):
+        try:
+            record = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._forget(token, "timed_out")
+            raise
+        except asyncio.CancelledError:
+            self._forget(token, "cancelled")
+            raise
+        finally:
+            self._pending.pop(token, None)
+
+        if record.result_class == "error":
+            raise GDBMIError(cmd, unescape_c_string(record.results.get("msg", "")), record)
+        return record
+
+    async def request_all(self, cmds):
+        """request() each of cmds, pipelined; their records in order.
+
+        A failed command gives its exception in place of the record. The
+        commands are queued with drain() in between, so a large batch goes
+        out as fast as GDB reads it instead of piling up in the buffer.
+        """
+        results = []
+        for cmd in cmds:
+            token, future = self._submit(cmd)
+            results.append(self.loop.create_task(self._result(cmd, token, future)))
+            await self.drain()
+        return await asyncio.gather(*results, return_exceptions=True)
+
+    READ_SIZE = 65536
+    # upper bound of bytes drained per wakeup, so a storm can't starve the loop
+    READ_BUDGET = 1 << 18
+
     #  @log_exceptions(logger)
     def read_task(self):
-        line = self.gdbmi.readline()
-        if not line:
+        """Drain everything the pty has buffered, then handle the complete records."""
+        chunks = []
+        size = 0
+        eof = False
+        while size < self.READ_BUDGET:
+            try:
+                data = os.read(self.gdbmi_interface_fd, self.READ_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                # EIO once the slave side of the pty is gone
+                data = b""
+            if not data:
+                eof = True
+                break
+            chunks.append(data)
+            size += len(data)
+
+        self.stats.count("pty reads")
+        if chunks:
+            self.stats.count("pty bytes read", size)
+            data = b"".join(chunks)
+            if self.recorder is not None:
+                self.recorder.write(transcript.READ, data)
+            self._feed(data)
+        if eof:
             raise GDBStopped
-        self._handle(line)
 
-    def _handle(self, line):
+    def _feed(self, data):
+        buf = self._read_buffer
+        buf += data
+        end = buf.rfind(b"\n")
+        if end < 0:
+            return
+        lines = bytes(buf[: end + 1]).splitlines()
+        del buf[: end + 1]
+        self._handle(lines)
+
+    def _handle(self, lines):
+        for line in lines:
+            if not line:
+                continue
+            # one bad record must not drop the rest of the batch
+            try:
+                self._handle_line(line)
+            except Exception:
+                self.error("failed to handle %r", line, exc_info=True)
+
+    def _handle_line(self, line):
         def _ignore(token, obj):
-            self.warn(["IGN:", token, obj])
+            self.warn("ignored %s %r", token, obj)
             return False
 
-        self.debug("\n" + repr(line))
+        self.debug("recv %r", line)
+        start = perf_counter()
         try:
-            token, obj = self.parser.parse(line.decode("utf8").rstrip("\r\n") + "\n")
+            token, obj = self.parser.parse(line.decode("utf8") + "\n")
         except ParseError as e:
             raise e
         else:
+            parsed = perf_counter()
             token = int(token) if token is not None else token
-            if obj is None or obj is self.parser.GDB_PROMPT:
+            if obj is None:
+                return
+            if obj is self.parser.GDB_PROMPT:
+                if not self.ready.done():
+                    self._on_ready()
                 return
-            self.debug("obj {}".format(obj.What))
+            # "stopped", "breakpoint-created", ... or the result/stream class
+            kind = obj.name if obj.What == "AsyncRecord" else obj[1]
+            self.stats.add("parse", kind, parsed - start)
             self.handlers.get(obj.What, _ignore)(token, obj)
-            event = self.commands.get(token, {}).get("waiting", None)
-            if event is not None:
-                event.set()
+            self.stats.add("handle", kind, perf_counter() - parsed)
 
     def _handle_result(self, token, obj):
-        self.debug("handle result")
         if token is None:
             return
 
         command = self.commands.get(token, None)
         if command is None:
-            self.error("Unexpected feed back token")
+            if token <= self.token:
+                self.debug("dropped late result of %d", token)
+            else:
+                self.error("Unexpected feed back token")
             return
 
         command["state"] = obj.What
         command["result"] = obj
-        if "event" in command:
-            command["event"].set()
-            self.debug(f"event of {token} set")
+        self.stats.add("round trip", command["cmd"].split(None, 1)[0], perf_counter() - command["time"])
+
+        if obj.result_class == "running":
+            # keep it until *stopped, which carries no token, for its exec_callback
+            self._finish(self._running_token)
+            self._running_token = token
+        else:
+            self._finish(token)
+            if self._exec is not None and self._exec[0] == token:
+                # refused, or a console command that did not resume the inferior
+                if obj.result_class == "error":
+                    self.ui.error(unescape_c_string(obj.results.get("msg", "")))
+                self._exec_done()
+
+        future = self._pending.pop(token, None)
+        if future is not None and not future.done():
+            future.set_result(obj)
+
+    def _on_ready(self):
+        elapsed = perf_counter() - self.created
+        self.info("MI channel ready after %.3fs", elapsed)
+        self.stats.add("startup", "spawn to ready", elapsed)
+        self.ready.set_result(elapsed)
+        self.ui.session_ready(self.name, round(elapsed * 1000))
+
+    async def startup(self, commands, breakpoint_dir=None, project=None):
+        """Run CLI commands once the MI channel is ready, pipelined in one batch.
+
+        They go through -interpreter-exec console, so their output is not
+        shown in the GDB terminal; failures are reported to the user. With
+        breakpoint_dir, the breakpoints saved for project and the loaded
+        executable are inserted first, in the same batch, and saved there
+        from then on.
+        """
+        await self.ready
+        start = perf_counter()
+        await self._find_executable()
+        saved = []
+        if breakpoint_dir:
+            saved = self._saved_breakpoints(breakpoint_dir, project)
+        batch = [persist.insert_command(entry) for entry in saved]
+        batch += [f"-interpreter-exec console {quote_c_string(cmd)}" for cmd in commands]
+        results = await self.request_all(batch)
+
+        restored = []
+        failed = 0
+        for entry, result in zip(saved, results):
+            if isinstance(result, Exception):
+                self.warn("restoring %r: %s", entry, result)
+                failed += 1
+            else:
+                restored.append(Breakpoint.from_mi(result.results["bkpt"]))
+        # -break-insert answers with the breakpoint, no =breakpoint-created follows
+        self._store_breakpoints(restored)
+        if failed:
+            self.ui.error(f"{failed} of {len(saved)} saved breakpoints could not be restored")
+        for cmd, result in zip(commands, results[len(saved):]):
+            if isinstance(result, Exception):
+                self.ui.error(f"{cmd}: {getattr(result, 'msg', result)}")
+        self.stats.add("startup", "startup commands", perf_counter() - start)
+
+    async def _find_executable(self):
+        try:
+            record = await self.request("-list-thread-groups")
+        except GDBMIError as e:
+            self.warn("cannot tell the executable: %s", e)
+            self.executable = ""
+            return
+        for group in record.results.get("groups", ()):
+            if group.get("executable"):
+                self.executable = unescape_c_string(group["executable"])
+                return
+        self.executable = ""
+
+    def _saved_breakpoints(self, directory, project):
+        self.breakpoint_file = persist.breakpoint_file(directory, project, self.executable)
+        self._breakpoint_owner = (project, self.executable)
+        try:
+            return persist.load(self.breakpoint_file)
+        except (OSError, ValueError) as e:
+            self.ui.error(f"cannot read saved breakpoints: {e}")
+            return []
+
+    def lookup_symbols(self, text, limit=100):
+        """[name, file, line] of the functions matching text, see SymbolIndex.lookup.
+
+        Answers from the index in memory only. Until it is there, the first
+        lookup starts reading it from symbol_dir, or building it from GDB,
+        in the background, and lookups return None; the user is told.
+        """
+        if self.symbol_index is None:
+            if self._symbol_task is None:
+                self._symbol_task = task = asyncio.ensure_future(self._load_symbol_index())
+                task.add_done_callback(self._symbol_task_done)
+            self.ui.message("indexing the functions of the executable...")
+            return None
+        start = perf_counter()
+        rows = self.symbol_index.lookup(text, limit)
+        self.stats.add("symbols", "lookup", perf_counter() - start)
+        return rows
+
+    def _symbol_task_done(self, task):
+        if self._symbol_task is task:
+            self._symbol_task = None
+
+    def _forget_symbols(self):
+        """Drop the index; the next lookup finds the executable again."""
+        if self._symbol_task is not None:
+            self._symbol_task.cancel()
+            self._symbol_task = None
+        self.symbol_index = None
+        self.executable = ""
+
+    def _symbol_index_file(self):
+        try:
+            key = index_key(self.executable)
+        except OSError:
+            key = None
+        if key is None or not self.symbol_dir:
+            return None, None
+        return index_file(self.symbol_dir, self.executable), key
+
+    async def _load_symbol_index(self):
+        """Read the index of the executable from symbol_dir, or build it from GDB.
+
+        Finds the executable first if needed. Reading the index and
+        SymbolIndex.from_mi run in an executor, but the -symbol-info-functions
+        reply is still parsed on the loop by the MI reader: for 200k
+        functions that blocks it for about 1.9 s, the build takes 0.3 s more.
+        """
+        if not self.executable:
+            await self._find_executable()
+            if not self.executable:
+                self.ui.error("no executable to look up symbols in")
+                return
+        path, key = self._symbol_index_file()
+        start = perf_counter()
+        if path is not None:
+            index = await self.loop.run_in_executor(None, SymbolIndex.load, path, key)
+            if index is not None:
+                self.stats.add("symbols", "load index", perf_counter() - start)
+                self.symbol_index = index
+                return
+        try:
+            record = await self.request("-symbol-info-functions")
+            index = await self.loop.run_in_executor(None, SymbolIndex.from_mi, record.results)
+        except GDBMIError as e:
+            self.ui.error(f"cannot index the functions: {e.msg}")
+            return
+        except Exception as e:
+            self.error("building the symbol index", exc_info=True)
+            self.ui.error(f"cannot index the functions: {e!r}")
+            return
+        self.stats.add("symbols", "build index", perf_counter() - start)
+        self.symbol_index = index
+        self.ui.message(f"{len(index):,} functions indexed")
+        if path is not None:
+            try:
+                index.save(path, key)
+            except OSError as e:
+                self.warn("cannot save the symbol index: %s", e)
+
+    SAVE_DELAY = 1.0
+
+    def _schedule_save(self):
+        if self.breakpoint_file is not None and self._save_timer is None:
+            self._save_timer = self.loop.call_later(self.SAVE_DELAY, self.save_breakpoints)
+
+    def save_breakpoints(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        if self.breakpoint_file is None:
+            return
+        try:
+            n = persist.save(self.breakpoint_file, *self._breakpoint_owner, self.breakpoints)
+        except OSError as e:
+            self.ui.error(f"cannot save breakpoints: {e}")
+        else:
+            self.debug("saved %d breakpoints to %s", n, self.breakpoint_file)
+
+    def _finish(self, token):
+        command = self.commands.pop(token, None)
+        if command is None:
+            return None
+        result = command.get("result")
+        if result is not None and result.result_class == "error":
+            self.command_counters["errored"] += 1
+        else:
+            self.command_counters["completed"] += 1
+        self.recent_commands.append((token, command))
+        return command
+
+    def _forget(self, token, reason):
+        if self.commands.pop(token, None) is not None:
+            self.command_counters[reason] += 1
+
+    def command_stats(self):
+        counters = self.command_counters
+        return {
+            "in_flight": len(self.commands),
+            "sent": counters["sent"],
+            "completed": counters["completed"],
+            "errored": counters["errored"],
+            "timed_out": counters["timed_out"],
+            "cancelled": counters["cancelled"],
+            "write_queue_bytes": len(self._write_buffer),
+            "write_queue_max_bytes": self._write_queue_max,
+        }
 
     def _handle_async_notify(self, token, obj, kwargs):
         if obj.name == "thread-group-added":
@@ -110,7 +531,11 @@ class Session(object):
 
         elif obj.name == "thread-group-started":
             tg = self.thread_groups[obj.results["id"]]
-            tg["pid"] = obj.results["pid"]
+            tg.pid = int(obj.results["pid"])
+            # a new run may come from a rebuilt tree
+            self.paths.invalidate()
+            self._refresh_signs()
+            self._forget_symbols()
             return True
 
         elif obj.name == "thread-groups-exited":
@@ -120,15 +545,17 @@ class Session(object):
 
         elif obj.name == "thread-created":
             tg = self.thread_groups[obj.results["group-id"]]
-            tg["threads"].add(obj.results["id"])
+            tg.threads.add(obj.results["id"])
             return True
 
         elif obj.name == "thread-selected":
-            self.ui.jump_frame(obj.results["frame"])
+            frame = self._frame(obj.results["frame"])
+            self.frame_level = frame.level or 0
+            self.ui.jump_frame(frame)
 
         elif obj.name == "library-loaded":
-            tg = self.thread_groups[obj.results["thread-group"]]
-            tg["library"][obj.results["id"]] = obj.results
+            lib = Library.from_mi(obj.results)
+            self.thread_groups[lib.thread_group].libraries[lib.id] = lib
             return True
 
         elif obj.name.startswith("breakpoint-"):
@@ -138,22 +565,33 @@ class Session(object):
         self.exec_state = obj.name
 
         if obj.name == "running":
+            self._supersede()
             return True
 
         elif obj.name == "stopped":
+            self._supersede()
+            self.stop_count += 1
+            self.frame_level = 0
+            ours = self._exec is not None and self._exec[0] == self._running_token
+            requested = self._exec[2] if ours else None
+            command = self._finish(self._running_token) or {}
+            self._running_token = None
             frame = obj.results.get("frame", None)
+            if frame is not None:
+                frame = self._frame(frame)
+                callback = command.get("exec_callback", None)
+                if callback:
+                    self.debug("calling exec callback")
+                    callback(frame)
+                self.ui.jump_frame(frame, requested)
+            if ours:
+                self._exec_done()
             if frame is None:
                 return True
-            callback = self.commands.get(token, {}).get("exec_callback", None)
-            if callback:
-                self.debug("calling exec callback")
-                callback(frame)
-            self.ui.jump_frame(frame)
-            self._query_display(frame)
+            self._query_display(frame, int(obj.results.get("thread-id", 0)))
             return True
 
     def _handle_async(self, token, obj, **kwargs):
-        self.debug("handle async")
         if obj.async_class == "NOTIFY_CLASS":
             return self._handle_async_notify(token, obj, kwargs)
 
@@ -169,12 +607,7 @@ class Session(object):
     def _add_thread_group(self, info, group_id=None):
         if group_id is None:
             group_id = info["id"]
-        tg = {
-            "id": group_id,
-            "pid": None,
-            "threads": set(),
-            "library": {},
-        }
+        tg = ThreadGroup(group_id)
         self.thread_groups[group_id] = tg
         self.info(tg)
 
@@ -194,69 +627,126 @@ class Session(object):
             tmp_kwds.update(to_call)
             to_call["proc"](tmp_kwds)
 
-    def _update_breakpoint(self, obj):
-        def _set_breakpoint(info):
-            self.breakpoints.setdefault(info["number"], {}).update(info)
-            if "fullname" in info:
-                self.debug("set_breakpoint %s:%s", info["fullname"], info["line"])
-                self.ui.set_breakpoint(
-                    int(info["number"].replace(".", "")), info["fullname"], info["line"]
-                )
-                self.ui.jump(info["fullname"], info["line"])
+    def _frame(self, info):
+        """Frame.from_mi with fullname resolved to a local file, or None."""
+        frame = Frame.from_mi(info)
+        frame.fullname = self.paths.resolve(frame.fullname)
+        return frame
+
+    def _signs(self, bkpt):
+        """{sign id: (file, line)} of the located sites of a breakpoint.
+
+        Location "N.M" gets id N << 16 | M, so locations never collide with
+        other breakpoint numbers. Sites without a local source get no sign.
+        """
+        signs = {}
+        for site in BreakpointStore.sites(bkpt):
+            path = self.paths.resolve(site.fullname)
+            if path:
+                major, _, minor = site.number.partition(".")
+                signs[int(major) << 16 | int(minor or 0)] = (path, site.line)
+        return signs
 
+    def _update_breakpoint(self, obj):
         if obj.name == "breakpoint-deleted":
-            info = self.breakpoints.pop(obj.results["id"], {})
-            if "fullname" in info:
-                self.ui.del_breakpoint(int(info["number"]))
-            if "multi" in info:
-                for i in info["multi"]:
-                    self.ui.del_breakpoint(int(i["number"].replace(".", "")))
-        else:
-            info = obj.results["bkpt"]
-            if obj.name == "breakpoint-created":
-                if isinstance(info, list):
-                    number = info[0]["number"]
-                    d = self.breakpoints.setdefault(number, {})
-                    d.update(info[0])
-                    d["multi"] = [i["number"] for i in info[1:]]
-                    for i in info[1:]:
-                        _set_breakpoint(i)
-                else:
-                    self.breakpoints.setdefault(info["number"], {}).update(info)
-                    if "fullname" in info:
-                        self.debug("set_breakpoint %s:%s", info["fullname"], info["line"])
-                        self.ui.set_breakpoint(int(info["number"]), info["fullname"], info["line"])
-                        self.ui.jump(info["fullname"], info["line"])
-                    elif "locations" in info:
-                        for i in info["locations"]:
-                            i['type'] = info['type']
-                            _set_breakpoint(i)
-
-    def breakpoints_status(self, filename, line):
-        for number, bkpt in self.breakpoints.items():
-            if bkpt["type"] == "breakpoint" and bkpt["addr"] != "<MULTIPLE>":
-                if int(bkpt["line"]) == int(line) and bkpt["fullname"] == filename:
-                    return number
-        else:
-            return 0
-
-    def get_breakpoints(self):
-        results = []
-        for number, bkpt in self.breakpoints.items():
-            if bkpt["type"] == "breakpoint" and bkpt["addr"] != "<MULTIPLE>":
-                results.append(
-                    {
-                        "number": number,
-                        "filename": bkpt["fullname"],
-                        "lnum": bkpt["line"],
-                        "text": bkpt["func"],
-                    }
-                )
-        return results
-
-    def wait_for(self, token):
-        self.debug("waiting for {}".format(token))
-        return self.commands[token]["waiting"].wait()
+            bkpt = self.breakpoints.remove(obj.results["id"])
+            if bkpt is None:
+                return
+            self._place_signs([(bkpt.number, {})])
+            self._schedule_save()
+
+        elif obj.name in ("breakpoint-created", "breakpoint-modified"):
+            bkpt = Breakpoint.from_mi(obj.results["bkpt"])
+            self._store_breakpoints([bkpt], jump=obj.name == "breakpoint-created")
+
+    def _store_breakpoints(self, bkpts, jump=False):
+        """Add or replace bkpts in the store, and update their signs in one go.
+
+        With jump, the cursor goes to a breakpoint that got a single new sign.
+        """
+        for bkpt in bkpts:
+            self.breakpoints.add(bkpt)
+        self._place_signs([(bkpt.number, self._signs(bkpt)) for bkpt in bkpts], jump)
+        if bkpts:
+            self._schedule_save()
+
+    def _refresh_signs(self):
+        """Place the signs of all breakpoints again, after paths may resolve differently."""
+        self._place_signs([(bkpt.number, self._signs(bkpt)) for bkpt in self.breakpoints])
+
+    def _place_signs(self, placements, jump=False):
+        """Make the signs of each (number, signs) pair the ones shown.
+
+        They are diffed against the signs placed before for that number,
+        not recomputed from the old breakpoint, so a sign placed while its
+        source resolved is still removed once it no longer does.
+        """
+        removed = []
+        added = []
+        sites = set()
+        for number, signs in placements:
+            old_signs = self._placed.pop(number, {})
+            if signs:
+                self._placed[number] = signs
+            # a modified breakpoint keeps the signs whose site did not move
+            gone = [id for id, site in old_signs.items() if signs.get(id) != site]
+            new = [[id, *site] for id, site in signs.items() if old_signs.get(id) != site]
+            if gone or new:
+                self.debug("set_breakpoint %s: %d locations", number, len(new))
+                removed += gone
+                added += new
+            old_sites = set(old_signs.values())
+            new_sites = set(signs.values())
+            for site in old_sites - new_sites:
+                numbers = self._placed_at[site]
+                del numbers[number]
+                if not numbers:
+                    del self._placed_at[site]
+            for site in new_sites - old_sites:
+                self._placed_at.setdefault(site, {})[number] = None
+            sites |= old_sites ^ new_sites
+        if removed:
+            self.ui.del_breakpoints(self.name, removed)
+        if added:
+            self.ui.set_breakpoints(self.name, added)
+            if jump and len(added) == 1:
+                self.ui.jump(*added[0][1:])
+        if sites:
+            self._update_breakpoint_map(sites)
+
+    def _update_breakpoint_map(self, sites):
+        """Send the breakpoint numbers now on each (file, line) of sites.
+
+        The editor keeps them in t:gdbmi_breakpoints["file:line"], by local
+        path, and decides :GDBMIBreakpointToggle locally; 0 removes the entry.
+        """
+        updates = []
+        for path, line in sites:
+            numbers = [
+                number for number in self._placed_at.get((path, line), ())
+                if self.breakpoints.get(number).type == "breakpoint"
+            ]
+            updates.append([f"{path}:{line}", numbers[0] if numbers else 0])
+        self.ui.update_breakpoint_map(self.name, updates)
+
+    def location_page(self, kind, cwd, start, count):
+        """Denite candidates start to start + count of a location list.
+
+        Only "breakpoints", the located breakpoint sites, for now. The
+        formatted candidates are kept until the list changes or cwd does.
+        """
+        if kind != "breakpoints":
+            return []
+        locations = self.breakpoints.listing()
+        current = self._location_lists.get(kind)
+        if current is None or current.locations is not locations or current.cwd != cwd:
+            if self._relpaths is None or self._relpaths.cwd != cwd:
+                self._relpaths = RelativePaths(cwd)
+            current = self._location_lists[kind] = LocationList(locations, self._relpaths, self.paths.resolve)
+        began = perf_counter()
+        page = current.page(start, count)
+        self.stats.add("locations", "page", perf_counter() - began)
+        return page
 
     def do_exec(self, cmd, *args, callback=None):
         if cmd in (
@@ -265,50 +755,121 @@ class Session(object):
             "step",
             "continue",
             "finish",
+            "until",
             "next-instruction",
             "step-instruction",
         ):
             token = self._send("-exec-" + cmd + " " + " ".join(args), exec_callback=callback)
             return token
+        if cmd == "advance":
+            # no MI equivalent
+            return self._send(
+                "-interpreter-exec console " + quote_c_string(" ".join((cmd,) + args)),
+                exec_callback=callback,
+            )
+
+    def exec(self, cmd, *args):
+        """Run an exec command once the previous one has stopped.
+
+        Commands requested while the inferior runs are queued; a request
+        equal to the last queued one is dropped, so holding a stepping key
+        doesn't pile up steps.
+        """
+        request = (cmd, args)
+        now = perf_counter()
+        if self._exec is None:
+            self._exec_send(request, now)
+        elif self._exec_queue and self._exec_queue[-1][0] == request:
+            self.stats.count("exec deduplicated")
+        else:
+            self._exec_queue.append((request, now))
+
+    def _exec_send(self, request, requested):
+        cmd, args = request
+        token = self.do_exec(cmd, *args)
+        if token is None:
+            self.ui.error(f"unknown exec command: {cmd}")
+            return
+        self._exec = (token, cmd, requested)
+
+    def _exec_done(self):
+        _, cmd, requested = self._exec
+        self._exec = None
+        self.stats.add("exec", f"{cmd} request to stop", perf_counter() - requested)
+        while self._exec is None and self._exec_queue:
+            self._exec_send(*self._exec_queue.popleft())
+
+    async def navigate(self, direction):
+        """Select the caller ("up") or callee ("down") of the selected frame."""
+        level = self.frame_level + (1 if direction == "up" else -1)
+        if level < 0:
+            self.ui.error("Bottom (innermost) frame selected; you cannot go down.")
+            return
+        requested = perf_counter()
+        try:
+            # pipelined: the frame comes back in the same round trip
+            _, record = await asyncio.gather(
+                self.request(f"-stack-select-frame {level}"),
+                self.request("-stack-info-frame"),
+            )
+        except GDBMIError as e:
+            self.ui.error(e.msg)
+            return
+        frame = self._frame(record.results["frame"])
+        self.frame_level = frame.level or 0
+        self.stats.add("exec", f"{direction} request to frame", perf_counter() - requested)
+        self.ui.jump_frame(frame, requested)
 
     def add_display(self, expr):
-        self._display_exprs[expr] = {}
-        self.debug(self._display_exprs)
-
-    def _query_display(self, frame):
-        self.debug(frame)
-        result = self._query_display_expr(frame)
-        #  self.debug(result)
-
-        self._gather_result(result)
-
-    def _query_display_expr(self, frame):
-        result = {}
-        for expr, values in self._display_exprs.items():
-            ev = asyncio.Event()
-            token = self._send(f"-data-evaluate-expression {expr}", event=ev)
-            result[token] = (ev, frame, values)
-
-        return result
-
-    def _gather_result(self, result):
-        async def one_expr(token, ev, frame, values):
-            await ev.wait()
-            obj = self.commands[token]["result"]
-            values.setdefault(frame["addr"], []).append(
-                obj.results if obj.result_class == "done" else None
+        self.watches.add(expr)
+
+    def expand_display(self, row):
+        asyncio.ensure_future(self.watches.toggle(row))
+
+    def _supersede(self):
+        self.generation += 1
+        if self._display_timer is not None:
+            self._display_timer.cancel()
+            self._display_timer = None
+
+    def _query_display(self, frame, thread):
+        # only query once the inferior stays stopped for settle_delay
+        if self.watches.watches:
+            self._display_timer = self.loop.call_later(
+                self.settle_delay,
+                self._start_display_query,
+                frame,
+                self.stop_count,
+                thread,
+                self.generation,
             )
-            self.debug(values)
 
-        coros = [one_expr(token, *t_values) for token, t_values in result.items()]
-        asyncio.gather(*coros)
-        #  task = asyncio.ensure_future(asyncio.gather(*coros))
-        #  task.add_done_callback(lambda : self.debug("all expr get value"))
+    def _start_display_query(self, frame, stop, thread, generation):
+        self._display_timer = None
+        asyncio.ensure_future(self.watches.update(frame, stop, thread, generation))
+
+    def display_history(self, expr, first=0, last=None):
+        return self.watches.history(expr, first, last)
 
     def stop(self):
-        loop = asyncio.get_event_loop()
-        loop.remove_reader(self.gdbmi_interface_fd)
+        self.save_breakpoints()
+        self._supersede()
+        self.loop.remove_reader(self.gdbmi_interface_fd)
+        if self._writer:
+            self.loop.remove_writer(self.gdbmi_interface_fd)
+            self._writer = False
+        self._write_buffer.clear()
+        for future in self._drain_waiters:
+            future.cancel()
+        self._drain_waiters.clear()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
 
 class GDBStopped(Exception):
     pass
+
@@ -0,0 +1,212 @@
+# encoding: utf-8
+
+"""An index of the functions of an executable, kept on disk between sessions.
+
+-symbol-info-functions takes seconds on a large binary, so its answer is
+saved as text and only asked again when the executable's mtime or
+build-id changed. The file starts with MAGIC and the key line, then the
+source files, one per line, up to an empty line, then one symbol per line
+sorted by name: "name<TAB>file index<TAB>line", with file index -1 for
+symbols without debug info.
+"""
+
+import os
+import re
+import struct
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from gdbmi_interface.gdbmi.parse import unescape_c_string
+
+MAGIC = "gdbmi-symbols 1"
+
+_NT_GNU_BUILD_ID = 3
+_PT_NOTE = 4
+
+
+def build_id(path):
+    """The GNU build-id of an ELF file as hex, or "" if it has none."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(64)
+            if header[:4] != b"\x7fELF" or len(header) < 52:
+                return ""
+            elf64 = header[4] == 2
+            endian = "<" if header[5] == 1 else ">"
+            if elf64:
+                phoff, = struct.unpack_from(endian + "Q", header, 0x20)
+                phentsize, phnum = struct.unpack_from(endian + "HH", header, 0x36)
+            else:
+                phoff, = struct.unpack_from(endian + "I", header, 0x1C)
+                phentsize, phnum = struct.unpack_from(endian + "HH", header, 0x2A)
+            f.seek(phoff)
+            table = f.read(phentsize * phnum)
+            for i in range(phnum):
+                entry = i * phentsize
+                if elf64:
+                    ptype, = struct.unpack_from(endian + "I", table, entry)
+                    offset, = struct.unpack_from(endian + "Q", table, entry + 8)
+                    size, = struct.unpack_from(endian + "Q", table, entry + 0x20)
+                else:
+                    ptype, offset = struct.unpack_from(endian + "II", table, entry)
+                    size, = struct.unpack_from(endian + "I", table, entry + 0x10)
+                if ptype != _PT_NOTE:
+                    continue
+                f.seek(offset)
+                notes = f.read(size)
+                pos = 0
+                while pos + 12 <= len(notes):
+                    namesz, descsz, ntype = struct.unpack_from(endian + "III", notes, pos)
+                    pos += 12
+                    name = notes[pos:pos + namesz]
+                    pos += (namesz + 3) & ~3
+                    desc = notes[pos:pos + descsz]
+                    pos += (descsz + 3) & ~3
+                    if ntype == _NT_GNU_BUILD_ID and name == b"GNU\0":
+                        return desc.hex()
+    except (OSError, struct.error):
+        pass
+    return ""
+
+
+def index_key(executable):
+    """What a saved index of executable must match to be reused."""
+    st = os.stat(executable)
+    return f"{executable}\t{st.st_mtime_ns}\t{build_id(executable)}"
+
+
+def index_file(directory, executable):
+    digest = hashlib.sha1(executable.encode("utf8")).hexdigest()[:16]
+    return os.path.join(directory, f"{os.path.basename(executable)}-{digest}.idx")
+
+
+def _unescape(value):
+    return unescape_c_string(value) if "\\" in value else value
+
+
+class SymbolIndex:
+    """Function names sorted for prefix lookups, with where they are defined.
+
+    Names are also joined, lower-cased, in one string, so a fuzzy lookup
+    is a few regex scans instead of a match per name.
+    """
+
+    __slots__ = ("names", "files", "file_of", "lines", "_blob", "_starts")
+
+    def __init__(self, names, file_of, lines, files):
+        """Columns sorted by name; file_of indexes files, -1 without debug info.
+
+        file_of and lines hold ints, or their decimal strings as loaded,
+        which are only converted for the rows looked up.
+        """
+        self.names = names
+        self.file_of = file_of
+        self.lines = lines
+        self.files = files
+        # lowering may change the length of a name, the offsets are of the lowered ones
+        folded = [name.lower() for name in names]
+        self._blob = "\n".join(folded)
+        self._starts = array("l", accumulate(map((1).__add__, map(len, folded)), initial=0))
+
+    @classmethod
+    def from_symbols(cls, symbols, files):
+        """symbols: (name, file index or -1, line) tuples, in any order."""
+        symbols.sort()
+        return cls(
+            [name for name, _, _ in symbols],
+            array("l", [file for _, file, _ in symbols]),
+            array("l", [line for _, _, line in symbols]),
+            files,
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_mi(cls, results):
+        """Build from the results of -symbol-info-functions."""
+        symbols = []
+        files = []
+        tables = results.get("symbols", {})
+        for debug in tables.get("debug", ()):
+            fullname = _unescape(debug.get("fullname") or debug.get("filename", ""))
+            files.append(fullname)
+            file = len(files) - 1
+            for symbol in debug.get("symbols", ()):
+                symbols.append((_unescape(symbol["name"]), file, int(symbol.get("line", 0))))
+        for symbol in tables.get("nondebugging", ()):
+            symbols.append((_unescape(symbol["name"]), -1, 0))
+        return cls.from_symbols(symbols, files)
+
+    @classmethod
+    def load(cls, path, key):
+        """The index saved at path if it was built for key, else None."""
+        try:
+            with open(path, encoding="utf8") as f:
+                if f.readline().rstrip("\n") != MAGIC or f.readline().rstrip("\n") != key:
+                    return None
+                files = []
+                for line in f:
+                    if line == "\n":
+                        break
+                    files.append(line[:-1])
+                # saved sorted, so the columns are read as they are
+                fields = f.read().replace("\n", "\t").split("\t")
+            fields.pop()
+            if len(fields) % 3:
+                return None
+            return cls(fields[0::3], fields[1::3], fields[2::3], files)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path, key):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            f.write(f"{MAGIC}\n{key}\n")
+            f.writelines(f"{file}\n" for file in self.files)
+            f.write("\n")
+            f.writelines(
+                f"{name}\t{file}\t{line}\n" for name, file, line in zip(self.names, self.file_of, self.lines)
+            )
+        os.replace(tmp, path)
+
+    def _row(self, i):
+        file = int(self.file_of[i])
+        return [self.names[i], self.files[file] if file >= 0 else "", int(self.lines[i])]
+
+    def prefix(self, text, limit=100):
+        start = bisect_left(self.names, text)
+        end = min(bisect_right(self.names, text + "\U0010ffff", start), start + limit)
+        return list(range(start, end))
+
+    def fuzzy(self, text, limit=100):
+        """Names that contain the characters of text in order, ignoring case."""
+        text = text.lower()
+        # each character matched at its first occurrence: no backtracking
+        pattern = re.compile(
+            re.escape(text[0]) + "".join(f"[^{re.escape(c)}\n]*{re.escape(c)}" for c in text[1:])
+        )
+        blob = self._blob
+        found = []
+        pos = 0
+        while len(found) < limit:
+            match = pattern.search(blob, pos)
+            if match is None:
+                break
+            found.append(bisect_right(self._starts, match.start()) - 1)
+            # one match per name
+            pos = blob.find("\n", match.end())
+            if pos < 0:
+                break
+        return found
+
+    def lookup(self, text, limit=100):
+        """[name, file, line] of the names starting with text, then fuzzy matches."""
+        found = self.prefix(text, limit)
+        if text and len(found) < limit:
+            seen = set(found)
+            found += [i for i in self.fuzzy(text, limit) if i not in seen][: limit - len(found)]
+        return [self._row(i) for i in found]
@@ -0,0 +1,50 @@
+# encoding: utf-8
+
+"""Timestamped recordings of the raw bytes exchanged over the MI pty.
+
+A transcript starts with MAGIC, followed by one frame per read or write:
+a little-endian (seconds since the start, direction, length) header and
+the bytes as they were read or written. Reads are b"<", writes b">".
+"""
+
+import struct
+import time
+
+MAGIC = b"gdbmi-transcript 1\n"
+FRAME = struct.Struct("<dcI")
+
+READ = b"<"
+WRITE = b">"
+
+
+class TranscriptWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.start = time.monotonic()
+
+    def write(self, direction, data):
+        self.file.write(FRAME.pack(time.monotonic() - self.start, direction, len(data)))
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+def read_transcript(path):
+    """Yield (seconds, direction, bytes) for each frame of a transcript."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a gdbmi transcript")
+        while True:
+            header = f.read(FRAME.size)
+            if not header:
+                return
+            if len(header) < FRAME.size:
+                raise ValueError(f"{path} is truncated")
+            seconds, direction, size = FRAME.unpack(header)
+            data = f.read(size)
+            if len(data) < size:
+                raise ValueError(f"{path} is truncated")
+            yield seconds, direction, data
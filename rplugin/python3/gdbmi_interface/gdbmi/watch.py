@@ -0,0 +1,280 @@
+# encoding: utf-8
+
+"""Display expressions backed by GDB variable objects.
+
+Each expression gets a floating varobj (-var-create - @ expr), so one
+-var-update --all-values * per stop reports only the values that changed,
+and only their rows are re-rendered.
+"""
+
+import asyncio
+from array import array
+
+from gdbmi_interface.gdbmi.parse import GDBMIError, quote_c_string, unescape_c_string
+from gdbmi_interface.log import getLogger
+
+logger = getLogger(__name__)
+
+
+class History:
+    """Bounded ring of (stop, thread, pc, value) samples of one watch.
+
+    Stop indexes, threads and pcs are kept in typed arrays; unchanged values
+    share the same str object across samples.
+    """
+
+    __slots__ = ("size", "head", "count", "stops", "threads", "pcs", "values")
+
+    def __init__(self, size):
+        self.size = size
+        self.head = 0
+        self.count = 0
+        self.stops = array("q", bytes(8 * size))
+        self.threads = array("l", bytes(array("l").itemsize * size))
+        self.pcs = array("Q", bytes(8 * size))
+        self.values = [None] * size
+
+    def append(self, stop, thread, pc, value):
+        if not self.size:
+            return
+        i = self.head
+        self.stops[i] = stop
+        self.threads[i] = thread
+        self.pcs[i] = pc
+        self.values[i] = value
+        self.head = (i + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def __len__(self):
+        return self.count
+
+    def query(self, first=0, last=None):
+        """Samples of stops first..last (inclusive), oldest first."""
+        rows = []
+        start = (self.head - self.count) % self.size if self.size else 0
+        for n in range(self.count):
+            i = (start + n) % self.size
+            stop = self.stops[i]
+            if stop < first or (last is not None and stop > last):
+                continue
+            rows.append([stop, self.threads[i], f"0x{self.pcs[i]:016x}", self.values[i]])
+        return rows
+
+
+class Watch:
+    __slots__ = (
+        "expr", "name", "value", "type", "numchild", "in_scope", "depth",
+        "children", "parent", "history", "creating",
+    )
+
+    def __init__(self, expr, depth=0, parent=None, history=0):
+        self.expr = expr
+        self.name = None
+        self.value = None
+        self.type = None
+        self.numchild = 0
+        self.in_scope = True
+        self.depth = depth
+        # None while collapsed, list of child watches once expanded
+        self.children = None
+        self.parent = parent
+        self.history = History(history) if history else None
+        # the -var-create in flight, so a stop does not create a second varobj
+        self.creating = None
+
+    def update(self, info):
+        if "name" in info:
+            self.name = info["name"]
+        if "value" in info:
+            self.value = unescape_c_string(info["value"])
+        if "type" in info:
+            self.type = info["type"]
+        if "numchild" in info:
+            self.numchild = int(info["numchild"])
+
+    def render(self):
+        if self.numchild:
+            marker = "- " if self.children is not None else "+ "
+        else:
+            marker = "  "
+        if self.name is None:
+            value = f"<{self.value}>" if self.value else "<not available>"
+        elif not self.in_scope:
+            value = "<out of scope>"
+        else:
+            value = self.value
+        return f"{'  ' * self.depth}{marker}{self.expr} = {value}"
+
+
+class WatchList:
+    TIMEOUT = 5
+    CHILD_LIMIT = 100
+
+    def __init__(self, session, ui, history=1000):
+        self.session = session
+        self.ui = ui
+        self.history_size = history
+        self.watches = {}
+        self.varobjs = {}
+        self.rows = []
+        # changes not rendered yet, because they came in for a superseded stop
+        self._dirty = {}
+        self._relayout = False
+
+    def add(self, expr):
+        if expr in self.watches:
+            return
+        watch = Watch(expr, history=self.history_size)
+        self.watches[expr] = watch
+        self._creation(watch, render=True)
+
+    def _creation(self, watch, render=False):
+        """The in-flight -var-create of watch, started if there is none."""
+        if watch.creating is None:
+            watch.creating = asyncio.ensure_future(self._create(watch, render))
+        return watch.creating
+
+    async def _create(self, watch, render=False):
+        try:
+            record = await self.session.request(
+                f"-var-create - @ {quote_c_string(watch.expr)}", self.TIMEOUT
+            )
+        except (GDBMIError, asyncio.TimeoutError) as e:
+            # no process yet, or not valid in this frame: retried on the next stop
+            watch.value = getattr(e, "msg", "timeout")
+        else:
+            watch.update(record.results)
+            self.varobjs[watch.name] = watch
+        finally:
+            watch.creating = None
+        if render:
+            self.render()
+
+    async def update(self, frame, stop, thread, generation):
+        """Refresh the watches for a stop.
+
+        The changes are always applied, since GDB reports each change only
+        once, but they are recorded and rendered only if the inferior has
+        not moved on since; otherwise the next current stop renders them.
+        """
+        pending = [w for w in self.watches.values() if w.name is None]
+        if pending:
+            await asyncio.gather(*(self._creation(w) for w in pending))
+
+        try:
+            record = await self.session.request("-var-update --all-values *", self.TIMEOUT)
+        except (GDBMIError, asyncio.TimeoutError) as e:
+            logger.debug("var-update failed: %s", e)
+            record = None
+
+        dirty = self._dirty
+        if any(w.name is not None for w in pending):
+            self._relayout = True
+        dirty.update((id(w), w) for w in pending if w.name is None)
+        for change in record.results.get("changelist", ()) if record else ():
+            watch = self.varobjs.get(change["name"])
+            if watch is None:
+                continue
+            in_scope = change.get("in_scope", "true")
+            if in_scope == "invalid":
+                self._drop_varobj(watch)
+                self._relayout = True
+                continue
+            watch.in_scope = in_scope == "true"
+            if "value" in change:
+                watch.value = unescape_c_string(change["value"])
+            if change.get("type_changed") == "true":
+                watch.type = change.get("new_type", watch.type)
+                watch.numchild = int(change.get("new_num_children", 0))
+                self._collapse(watch)
+                self._relayout = True
+            dirty[id(watch)] = watch
+
+        if generation != self.session.generation:
+            logger.debug("display results of stop %d superseded", stop)
+            return
+
+        pc = int(frame.addr, 16) if frame.addr else 0
+        for watch in self.watches.values():
+            if watch.history is not None:
+                value = watch.value if watch.name is not None and watch.in_scope else None
+                watch.history.append(stop, thread, pc, value)
+
+        if self._relayout:
+            self.render()
+        elif dirty:
+            self.render(list(dirty.values()))
+
+    def history(self, expr, first=0, last=None):
+        watch = self.watches.get(expr)
+        if watch is None or watch.history is None:
+            return []
+        return watch.history.query(first, last)
+
+    async def toggle(self, row):
+        if not 0 <= row < len(self.rows):
+            return
+        watch = self.rows[row]
+        if watch.children is not None:
+            self._collapse(watch)
+            await self._request_quiet(f"-var-delete -c {watch.name}")
+        elif watch.numchild and watch.name is not None:
+            record = await self._request_quiet(
+                f"-var-list-children --all-values {watch.name} 0 {self.CHILD_LIMIT}"
+            )
+            if record is None:
+                return
+            children = record.results.get("children", ())
+            watch.children = []
+            for info in children:
+                child = Watch(info.get("exp", ""), watch.depth + 1, watch)
+                child.update(info)
+                watch.children.append(child)
+                self.varobjs[child.name] = child
+        else:
+            return
+        self.render()
+
+    async def _request_quiet(self, cmd):
+        try:
+            return await self.session.request(cmd, self.TIMEOUT)
+        except (GDBMIError, asyncio.TimeoutError) as e:
+            logger.debug("%s failed: %s", cmd, e)
+            return None
+
+    def _collapse(self, watch):
+        for child in watch.children or ():
+            self._collapse(child)
+            self.varobjs.pop(child.name, None)
+        watch.children = None
+
+    def _drop_varobj(self, watch):
+        self._collapse(watch)
+        self.varobjs.pop(watch.name, None)
+        name, watch.name = watch.name, None
+        asyncio.ensure_future(self._request_quiet(f"-var-delete {name}"))
+
+    def _layout(self):
+        rows = []
+
+        def walk(watch):
+            rows.append(watch)
+            for child in watch.children or ():
+                walk(child)
+
+        for watch in self.watches.values():
+            walk(watch)
+        return rows
+
+    def render(self, changed=None):
+        self._dirty = {}
+        if changed is None:
+            self._relayout = False
+            self.rows = self._layout()
+            self.ui.render_watches([w.render() for w in self.rows])
+            return
+
+        index = {id(w): i for i, w in enumerate(self.rows)}
+        updates = [[index[id(w)], w.render()] for w in changed if id(w) in index]
+        if updates:
+            self.ui.update_watches(updates)
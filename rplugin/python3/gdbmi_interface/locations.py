@@ -0,0 +1,63 @@
+"""Denite candidates for the location lists a session serves.
+
+The gdbmi-locations source asks for them a page at a time, so a list of
+100k breakpoint sites is only formatted as far as the picker has read,
+and each page is formatted once per working directory.
+"""
+
+import os
+
+
+class RelativePaths(dict):
+    """Display paths relative to cwd, computed once per file."""
+
+    def __init__(self, cwd):
+        super().__init__()
+        self.cwd = cwd
+
+    def __missing__(self, path):
+        rel = os.path.relpath(path, self.cwd)
+        rel = self[path] = min(rel, path, key=len)
+        return rel
+
+
+class LocationList:
+    """Candidates for locations, formatted on demand.
+
+    locations are quickfix-like dicts (number, filename, lnum, text);
+    resolve maps a GDB file name to a local path, or None.
+    """
+
+    def __init__(self, locations, relpaths, resolve):
+        self.locations = locations
+        self.relpaths = relpaths
+        self.resolve = resolve
+        self.candidates = []
+
+    @property
+    def cwd(self):
+        return self.relpaths.cwd
+
+    def __len__(self):
+        return len(self.locations)
+
+    def page(self, start, count):
+        end = min(start + count, len(self.locations))
+        if end > len(self.candidates):
+            self._format(end)
+        return self.candidates[start:end]
+
+    def _format(self, end):
+        relpaths = self.relpaths
+        resolve = self.resolve
+        append = self.candidates.append
+        for location in self.locations[len(self.candidates):end]:
+            path = resolve(location["filename"]) or location["filename"]
+            relpath = relpaths[path]
+            text = location["text"] or ""
+            append({
+                "word": text or relpath,
+                "abbr": f'{relpath[-35:]:<35.35} [{location["lnum"]:>10}] {location["number"]}: {text}',
+                "action__path": path,
+                "action__line": location["lnum"],
+            })
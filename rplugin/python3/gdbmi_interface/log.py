@@ -1,40 +1,89 @@
 import os
+import atexit
 import logging
-from logging.config import dictConfig
-from logging.handlers import WatchedFileHandler
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import traceback
 import inspect
 import sys
 
 
+LEVELS = {
+    'off': logging.CRITICAL + 1,
+    'error': logging.ERROR,
+    'warning': logging.WARNING,
+    'info': logging.INFO,
+    'debug': logging.DEBUG,
+}
+
+_root = logging.getLogger("gdbmi")
+# nothing is written until configure(), and records never reach the host's loggers
+_root.addHandler(logging.NullHandler())
+_root.setLevel(logging.WARNING)
+_root.propagate = False
+_listener = None
+
+
 def getLogger(name):
-    d = {
-        'version': 1,
-        'formatters': {
-            'gdbmi': {
-                'class': 'logging.Formatter',
-                'format': '%(asctime)s %(levelname)-8s [%(process)d] (%(name)s) %(message)s'
-            }
-        },
-        'handlers': {
-            'file': {
-                'class': 'logging.handlers.WatchedFileHandler',
-                'filename': f'/tmp/gdbmi_{os.getpid()}.log',
-                'formatter': 'gdbmi'
-            }
-        },
-        'loggers': {
-            'gdbmi': {
-                'handlers': ['file'],
-                'level': 'DEBUG'
-            }
-        },
-    }
-    prevumask=os.umask(0o066)
-    dictConfig(d)
-    os.umask(prevumask)
-    logger = logging.getLogger("gdbmi")
-    return logger.getChild(name)
+    return _root.getChild(name)
+
+
+class PrivateRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler whose files are only readable by the user."""
+
+    def _open(self):
+        fd = os.open(self.baseFilename, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        return open(fd, self.mode, encoding=self.encoding)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() merges the message and its arguments, and renders
+    any traceback, on the calling thread. The record is queued as is here,
+    so arguments are formatted later and must not be mutated after the call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def configure(level='warning', filename=None, max_bytes=4 << 20, backup_count=2):
+    """Set up the "gdbmi" loggers; only the first call installs the writer.
+
+    Records are formatted and written by a QueueListener thread, so the
+    event loop only pays for the level check and the enqueue. With level
+    "off" every call is a single level check.
+    """
+    global _listener
+
+    _root.setLevel(LEVELS.get(str(level).lower(), logging.WARNING))
+    if _listener is not None or _root.level > logging.CRITICAL:
+        return
+
+    if filename is None:
+        filename = f'/tmp/gdbmi_{os.getpid()}.log'
+    handler = PrivateRotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count, delay=True
+    )
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)-8s [%(process)d] (%(name)s) %(message)s'
+    ))
+    queue = SimpleQueue()
+    _listener = QueueListener(queue, handler)
+    _listener.start()
+    atexit.register(shutdown)
+    _root.handlers = [DeferredQueueHandler(queue)]
+
+
+def shutdown():
+    """Flush the queued records and stop the writer thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _root.handlers = [logging.NullHandler()]
 
 
 def exception(logger):
@@ -1,11 +1,17 @@
 import os
+import time
+import asyncio
 
-from gdbmi_interface.gdbmi import Session
+from gdbmi_interface import log
 from gdbmi_interface.ui import ui
 
 class GDBMI_rplugin():
     def __init__(self, vim):
         self.vim = vim
+        log.configure(
+            self.vim.vars.get("gdbmi_log_level", "warning"),
+            self.vim.vars.get("gdbmi_log_file") or None,
+        )
         ui.setVim(vim)
 
         self.sessions = {}
@@ -14,33 +20,77 @@ class GDBMI_rplugin():
 
     def start(self, args):
         name = args[0]
+        # the MI machinery is only loaded on the first launch
+        from gdbmi_interface.gdbmi import Session
+
         master, slave = os.openpty()
         slave_path = os.ttyname(slave)
-        self.sessions[name] = Session(name, master, slave_path, ui)
+        parser = self.vim.vars.get("gdbmi_parser", "scan")
+        history = self.vim.vars.get("gdbmi_display_history", 1000)
+        settle = self.vim.vars.get("gdbmi_display_settle_ms", 50) / 1000
+        substitutions = self.vim.vars.get("gdbmi_path_substitutions", [])
+        symbol_dir = self.vim.vars.get("gdbmi_symbol_dir")
+        record_dir = self.vim.vars.get("gdbmi_record_dir")
+        record = None
+        if record_dir:
+            record_dir = os.path.expanduser(record_dir)
+            os.makedirs(record_dir, exist_ok=True)
+            record = os.path.join(record_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.mi")
+        self.sessions[name] = Session(
+            name, master, slave_path, ui, parser, display_history=history, settle_delay=settle,
+            path_substitutions=substitutions, record=record,
+            symbol_dir=os.path.expanduser(symbol_dir) if symbol_dir else None,
+        )
+        return slave_path
+
+    def startup(self, args):
+        session_name, commands, breakpoint_dir, project = args
+        breakpoint_dir = os.path.expanduser(breakpoint_dir) if breakpoint_dir else None
+        asyncio.ensure_future(self.sessions[session_name].startup(commands, breakpoint_dir, project))
+
+    def exec(self, args):
+        session_name, cmd, *cmd_args = args
+        session = self.sessions[session_name]
+        if cmd in ("up", "down"):
+            asyncio.ensure_future(session.navigate(cmd))
+        else:
+            session.exec(cmd, *cmd_args)
 
-    def getSlave(self, args):
-        return self.sessions[args[0]].slave_path
+    def symbols(self, args):
+        session_name, text, limit = args
+        session = self.sessions.get(session_name)
+        return (session.lookup_symbols(text, limit) if session else None) or []
 
     def stop(self, args):
         name = args[0]
         self.sessions[name].stop()
         del self.sessions[name]
 
-    def breakswitch(self, args):
-        session_name, filename, line = args
+    def stats(self, args):
+        session_name, *_ = args
         session = self.sessions[session_name]
-        bp_id = session.breakpoints_status(filename, line)
-
-        if bp_id:
-            return f"delete { bp_id }"
-        else:
-            return f"break { filename }:{ line }"
+        lines = session.stats.report(f"session {session_name}")
+        lines += [f"{key:<32} {n:>12,}" for key, n in session.command_stats().items()]
+        lines += [""] + ui.stats.report("editor")
+        ui.show_stats(lines)
 
     def display(self, args):
         session_name, expr = args
         self.sessions[session_name].add_display(expr)
 
-    def breakpoints(self, args):
-        session_name, *_ = args
-        return self.sessions[session_name].get_breakpoints()
+    def display_history(self, args):
+        session_name, expr, first, last = args
+        rows = self.sessions[session_name].display_history(expr, first, last if last >= 0 else None)
+        lines = [f"{stop:>8} {thread:>6} {pc} {value}" for stop, thread, pc, value in rows]
+        ui.show_history(expr, lines)
+
+    def display_expand(self, args):
+        session_name, row = args
+        self.sessions[session_name].expand_display(int(row))
+
+    def locations(self, args):
+        session_name, kind, cwd, start, count = args
+        session = self.sessions.get(session_name)
+        page = session.location_page(kind, cwd, start, count) if session else []
+        ui.location_page(session_name, kind, start, page)
 
@@ -0,0 +1,86 @@
+"""Counters and latency histograms cheap enough to leave on.
+
+A sample costs a dict lookup, an int conversion and a few additions; the
+histograms use power-of-two microsecond buckets, so percentiles are upper
+bounds within a factor of two, which is what a "where does the time go"
+report needs.
+"""
+
+import collections
+from array import array
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total", "max")
+
+    # bucket i holds samples below 2**i us; the last one everything above ~16 s
+    BUCKETS = 25
+
+    def __init__(self):
+        self.buckets = array("Q", bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Upper bound of the p-th percentile, in seconds."""
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+
+def _ms(seconds):
+    return f"{seconds * 1e3:.3f}"
+
+
+class Stats:
+    """Named counters, plus histograms grouped by section and key."""
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self.timings = {}
+
+    def count(self, key, n=1):
+        self.counters[key] += n
+
+    def add(self, section, key, seconds):
+        hist = self.timings.get((section, key))
+        if hist is None:
+            hist = self.timings[section, key] = Histogram()
+        hist.add(seconds)
+
+    def clear(self):
+        self.counters.clear()
+        self.timings.clear()
+
+    def report(self, title):
+        """Lines for the :GDBMIStats buffer."""
+        lines = [f"== {title}"]
+        for key in sorted(self.counters):
+            lines.append(f"{key:<32} {self.counters[key]:>12,}")
+
+        section = None
+        for (sect, key), hist in sorted(self.timings.items()):
+            if sect != section:
+                section = sect
+                lines.append("")
+                lines.append(
+                    f"{sect:<32} {'count':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+                )
+            lines.append(
+                f"  {key:<30} {hist.count:>9,} {_ms(hist.total / hist.count):>9} "
+                f"{_ms(hist.percentile(50)):>9} {_ms(hist.percentile(99)):>9} {_ms(hist.max):>9}"
+            )
+        lines.append("")
+        return lines
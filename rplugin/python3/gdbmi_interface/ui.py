@@ -1,40 +1,136 @@
+import itertools
+from time import perf_counter
+
+from gdbmi_interface.log import getLogger
+from gdbmi_interface.stats import Stats
+
+logger = getLogger(__name__)
+
+
 class UI:
+    """Queues editor updates and sends them to Neovim in one batch.
+
+    Updates are keyed: a newer update with the same key replaces the queued
+    one (only the latest frame jump survives), and the queue is flushed once
+    per event loop tick as a single nvim_call_atomic. A failing update
+    is reported and the ones after it are sent again.
+    """
 
     def __init__(self):
-        pass
+        self._queue = {}
+        self._scheduled = False
+        self._scheduled_at = 0.0
+        # when the command behind the queued cursor move was requested
+        self._cursor_requested = None
+        self._seq = itertools.count()
+        self.stats = Stats()
 
     def setVim(self, vim):
         self.vim = vim
+        # the vim8 bridge has no nvim_call_atomic
+        self.atomic = hasattr(vim, 'api')
+
+    def _enqueue(self, key, func, *args):
+        if key is None:
+            key = next(self._seq)
+        else:
+            self._queue.pop(key, None)
+        self._queue[key] = (func, args)
+        self.stats.count('ui updates')
+        if not self._scheduled:
+            self._scheduled = True
+            self._scheduled_at = perf_counter()
+            self.vim.async_call(self.flush)
+
+    def flush(self):
+        self._scheduled = False
+        queue, self._queue = self._queue, {}
+        if not queue:
+            return
+        start = perf_counter()
+        stats = self.stats
+        stats.add('ui', 'queued before flush', start - self._scheduled_at)
+        stats.count('ui flushes')
+        for func, _ in queue.values():
+            stats.count(func)
+        if self.atomic:
+            calls = [['nvim_call_function', [func, list(args)]] for func, args in queue.values()]
+            while calls:
+                stats.count('rpc calls')
+                results, error = self.vim.api.call_atomic(calls)
+                if not error:
+                    break
+                # nvim_call_atomic stops at the failing call, send the rest
+                # again with the error report at the end
+                index, _, message = error
+                msg = f"UI update {calls[index][1][0]} failed: {message}"
+                logger.error(msg)
+                calls = calls[index + 1:] + [['nvim_call_function', ['gdbmi#util#print_error', [msg]]]]
+        else:
+            for func, args in queue.values():
+                stats.count('rpc calls')
+                self.vim.call(func, *args)
+        done = perf_counter()
+        stats.add('ui', 'flush rpc', done - start)
+        if self._cursor_requested is not None and 'cursor' in queue:
+            stats.add('ui', 'request to cursor', done - self._cursor_requested)
+            self._cursor_requested = None
 
     def jump(self, file, line):
-        self.vim.async_call(lambda : self.vim.call('gdbmi#util#jump', file, line))
+        self._enqueue('jump', 'gdbmi#util#jump', file, line)
 
-    def jump_frame(self, frame):
-        if 'fullname' in frame:
-            self.vim.async_call(lambda : self.vim.call('gdbmi#util#jump_frame', frame['fullname'], frame['line']))
+    def jump_frame(self, frame, requested=None):
+        self._cursor_requested = requested
+        if frame.fullname:
+            self._enqueue('cursor', 'gdbmi#util#jump_frame', frame.fullname, frame.line)
         else:
-            self.vim.async_call(lambda : self.vim.call('gdbmi#util#clear_cursor_sign'))
+            self._enqueue('cursor', 'gdbmi#util#clear_cursor_sign')
 
-    def set_breakpoint(self, id, file, line):
-        self.vim.async_call(lambda : self.vim.call('gdbmi#util#set_breakpoint_sign', id, file, line))
+    def set_breakpoints(self, name, signs):
+        self._enqueue(None, 'gdbmi#util#set_breakpoint_signs', name, signs)
 
-    def del_breakpoint(self, id):
-        self.vim.async_call(lambda : self.vim.call('gdbmi#util#del_breakpoint_sign', id))
+    def del_breakpoints(self, name, ids):
+        self._enqueue(None, 'gdbmi#util#del_breakpoint_signs', name, ids)
+
+    def update_breakpoint_map(self, name, updates):
+        self._enqueue(None, 'gdbmi#util#update_breakpoint_map', name, updates)
+
+    def render_watches(self, lines):
+        for key in [k for k in self._queue if isinstance(k, tuple) and k[0] == 'watch']:
+            del self._queue[key]
+        self._enqueue('watches', 'gdbmi#display#render_watches', lines)
+
+    def update_watches(self, updates):
+        self._enqueue(('watch', next(self._seq)), 'gdbmi#display#update_watches', updates)
+
+    def session_ready(self, name, ms):
+        self._enqueue(('ready', name), 'gdbmi#init#on_ready', name, ms)
+
+    def show_stats(self, lines):
+        self._enqueue('stats', 'gdbmi#display#show_stats', lines)
+
+    def location_page(self, name, kind, start, page):
+        self._enqueue(('locations', name, kind, start), 'gdbmi#util#set_location_page', name, kind, start, page)
+
+    def show_history(self, expr, lines):
+        self._enqueue(('history', expr), 'gdbmi#display#show_history', expr, lines)
 
     def del_cursor(self, thread_group_id):
         pass
 
     def float_display(self, context):
-        self.vim.async_call(lambda: self.vim.call('gdbmi#display#float_display'), context)
+        self._enqueue(None, 'gdbmi#display#float_display', context)
 
     def virtual_display(self, context):
-        self.vim.call('gdbmi#display#virtual_display', context)
+        self._enqueue(None, 'gdbmi#display#virtual_display', context)
+
+    def message(self, msg):
+        self._enqueue(None, 'gdbmi#util#print_message', msg)
 
     def async_error(self, msg):
-        self.vim.async_call('gdbmi#util#print_error', msg)
+        self._enqueue(None, 'gdbmi#util#print_error', msg)
 
     def error(self, msg):
-        self.vim.call('gdbmi#util#print_error', msg)
+        self._enqueue(None, 'gdbmi#util#print_error', msg)
 
 ui = UI()
-
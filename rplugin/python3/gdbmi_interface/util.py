@@ -6,5 +6,5 @@ logger = getLogger(__name__)
 def show_perf(func):
     start = time.perf_counter()
     func()
-    logger.debug(f'{func.__name__} Cost: {time.perf_counter() - start}')
+    logger.debug('%s Cost: %f', func.__name__, time.perf_counter() - start)
 
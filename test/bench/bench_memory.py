@@ -0,0 +1,82 @@
+"""Memory held by a session's breakpoint and library tables.
+
+Usage: python3 test/bench/bench_memory.py [--breakpoints 5000] [--libraries 2000]
+
+Feeds =breakpoint-created and =library-loaded records through
+Session._handle and compares the retained memory with keeping the parsed
+record dicts, which is what the session used to store.
+"""
+
+import sys
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "rplugin" / "python3"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import corpus  # noqa: E402
+from bench_parse import make_session, close_session  # noqa: E402
+from gdbmi_interface.gdbmi.parse import make_parser  # noqa: E402
+
+
+def breakpoint_records(count, files=200):
+    record = (
+        '=breakpoint-created,bkpt={{number="{0}",type="breakpoint",disp="keep",enabled="y",'
+        'addr="{1}",func="Module{2}::handler(Request const&)",file="handler{2}.cpp",'
+        'fullname="' + corpus.SRC_ROOT + '/module{2}/handler{2}.cpp",line="{3}",'
+        'thread-groups=["i1"],times="0",original-location="handler{2}.cpp:{3}"}}\n'
+    )
+    return [record.format(i + 1, corpus._addr(i), i % files, 10 + i) for i in range(count)]
+
+
+def retained(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        return tracemalloc.get_traced_memory()[0] - before, kept
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--breakpoints", type=int, default=5000)
+    ap.add_argument("--libraries", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    import asyncio
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    records = corpus.library_storm(args.libraries) + breakpoint_records(args.breakpoints)
+    lines = [r.encode("utf8") for r in records]
+
+    def as_dicts():
+        # what the session used to keep: the parsed results, per key
+        parser = make_parser("scan")
+        breakpoints, libraries = {}, {}
+        for line in lines:
+            _, obj = parser.parse(line.decode("utf8"))
+            if obj.name == "library-loaded":
+                libraries[obj.results["id"]] = obj.results
+            elif obj.name == "breakpoint-created":
+                breakpoints[obj.results["bkpt"]["number"]] = obj.results["bkpt"]
+        return breakpoints, libraries
+
+    def as_objects():
+        session = make_session("scan")
+        session._handle(lines)
+        close_session(session)
+        return session.breakpoints, session.thread_groups
+
+    old, _ = retained(as_dicts)
+    new, _ = retained(as_objects)
+    print(f"{args.breakpoints} breakpoints, {args.libraries} libraries")
+    print(f"  parsed dicts:    {old / 1e6:8.2f} MB")
+    print(f"  compact objects: {new / 1e6:8.2f} MB  ({new / old:.0%})")
+
+
+if __name__ == "__main__":
+    main()
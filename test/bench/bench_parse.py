@@ -0,0 +1,142 @@
+"""Throughput and memory of the MI hot path.
+
+Usage: python3 test/bench/bench_parse.py [--scale 1.0] [--repeat 3] [--save out.json] [--compare old.json]
+
+Measures GDBOutputParse/GDBOutputScanner.parse and Session._handle over the
+corpora from corpus.py and prints records/s, MB/s and peak traced memory.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "rplugin" / "python3"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import corpus  # noqa: E402
+from gdbmi_interface.gdbmi.parse import PARSERS  # noqa: E402
+from gdbmi_interface.gdbmi.session import Session  # noqa: E402
+
+
+class NullUI:
+    """Accepts every UI call and does nothing."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def make_session(parser):
+    master, slave = os.openpty()
+    session = Session("bench", master, os.ttyname(slave), NullUI(), parser)
+    session._bench_slave = slave
+    return session
+
+
+def close_session(session):
+    session.stop()
+    session.gdbmi.close()
+    os.close(session._bench_slave)
+
+
+def parse_runner(parser_name, records):
+    parser = PARSERS[parser_name]()
+
+    def run():
+        parse = parser.parse
+        return [parse(r) for r in records]
+
+    return run
+
+
+def handle_runner(parser_name, records):
+    lines = [r.encode("utf8") for r in records]
+
+    def run():
+        session = make_session(parser_name)
+        try:
+            session._handle(lines)
+        finally:
+            close_session(session)
+
+    return run
+
+
+def measure(run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def check_equivalence(records):
+    engines = {name: cls() for name, cls in PARSERS.items()}
+    for record in records:
+        results = {}
+        for name, p in engines.items():
+            obj = p.parse(record)[1]
+            results[name] = "(gdb)" if obj is p.GDB_PROMPT else obj
+        first, *others = results.values()
+        if any(o != first for o in others):
+            raise AssertionError(f"parsers disagree on {record[:80]!r}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--corpus", action="append", choices=sorted(corpus.CORPORA))
+    ap.add_argument("--save", help="write the results as json")
+    ap.add_argument("--compare", help="json from a previous --save to compare against")
+    args = ap.parse_args(argv)
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'benchmark':<28} {'records/s':>12} {'MB/s':>8} {'peak MB':>8} {'vs base':>8}")
+    for name in args.corpus or sorted(corpus.CORPORA):
+        records = corpus.generate(name, args.scale)
+        check_equivalence(records)
+        size = sum(len(r) for r in records)
+        runners = [(f"parse[{p}]", parse_runner(p, records)) for p in PARSERS]
+        runners += [(f"handle[{p}]", handle_runner(p, records)) for p in PARSERS]
+        for label, run in runners:
+            key = f"{name}/{label}"
+            elapsed, peak = measure(run, args.repeat)
+            results[key] = {
+                "records_per_sec": len(records) / elapsed,
+                "bytes_per_sec": size / elapsed,
+                "peak_bytes": peak,
+            }
+            old = baseline.get(key)
+            ratio = f"{results[key]['records_per_sec'] / old['records_per_sec']:.2f}x" if old else "-"
+            print(
+                f"{key:<28} {len(records) / elapsed:>12,.0f} {size / elapsed / 1e6:>8.2f} "
+                f"{peak / 1e6:>8.2f} {ratio:>8}"
+            )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""RPCs sent to Neovim per debugger event.
+
+Usage: python3 test/bench/bench_ui.py [--stops 200] [--burst 10] [--locations 1000]
+
+Feeds the stops and breakpoint corpora through Session._handle with the real
+UI class on top of a fake nvim that counts requests. "calls" is the number of
+UI updates issued by the session, which was also the number of RPCs before
+updates were queued; "rpcs" is what reaches Neovim now.
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "rplugin" / "python3"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import corpus  # noqa: E402
+from gdbmi_interface.ui import UI  # noqa: E402
+from gdbmi_interface.gdbmi.session import Session  # noqa: E402
+
+
+class FakeApi:
+    def __init__(self, vim):
+        self.vim = vim
+
+    def call_atomic(self, calls):
+        self.vim.rpcs += 1
+        self.vim.functions += len(calls)
+        return [None] * len(calls), None
+
+
+class FakeVim:
+    """Runs async_call callbacks on tick() and counts what would be sent."""
+
+    def __init__(self):
+        self.api = FakeApi(self)
+        self.callbacks = []
+        self.rpcs = 0
+        self.functions = 0
+
+    def async_call(self, fn, *args):
+        self.callbacks.append((fn, args))
+
+    def call(self, name, *args):
+        self.rpcs += 1
+        self.functions += 1
+
+    def tick(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for fn, args in callbacks:
+            fn(*args)
+
+
+def run(records, batch, src):
+    """Handle records batch lines per read, with an editor tick after each."""
+    vim = FakeVim()
+    ui = UI()
+    ui.setVim(vim)
+    master, slave = os.openpty()
+    session = Session(
+        "bench", master, os.ttyname(slave), ui, path_substitutions=[(corpus.SRC_ROOT, src)]
+    )
+    try:
+        lines = [r.encode("utf8") for r in records]
+        for i in range(0, len(lines), batch):
+            session._handle(lines[i:i + batch])
+            vim.tick()
+    finally:
+        session.stop()
+        session.gdbmi.close()
+        os.close(slave)
+    return ui.stats.counters["ui updates"], vim.rpcs, vim.functions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--stops", type=int, default=200)
+    ap.add_argument("--burst", type=int, default=10, help="stops per read in the burst case")
+    ap.add_argument("--locations", type=int, default=1000)
+    args = ap.parse_args(argv)
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    stops = corpus.stop_events(args.stops)
+    bkpt = corpus.breakpoint_locations(args.locations)
+    bkpt_deleted = bkpt + ['=breakpoint-deleted,id="1"\n']
+    cases = [
+        ("step", stops, 3, args.stops),
+        (f"burst x{args.burst}", stops, 3 * args.burst, args.stops),
+        (f"bkpt {args.locations} locs", bkpt, 1, 1),
+        ("+ delete", bkpt_deleted, 1, 2),
+    ]
+    print(f"{'case':<20} {'calls':>8} {'rpcs':>8} {'functions':>10} {'calls/event':>12} {'rpcs/event':>11}")
+    with tempfile.TemporaryDirectory() as src:
+        corpus.source_tree(src)
+        for label, records, batch, events in cases:
+            calls, rpcs, functions = run(records, batch, src)
+            print(
+                f"{label:<20} {calls:>8} {rpcs:>8} {functions:>10} "
+                f"{calls / events:>12.2f} {rpcs / events:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Synthetic GDB/MI output for the benchmarks.
+
+Every generator returns a list of records, each one a str ending with a
+newline, shaped like what GDB 12 prints for a large C++ program.
+"""
+
+import os
+import random
+
+SRC_ROOT = "/home/dev/project/src"
+LIB_ROOT = "/usr/lib/x86_64-linux-gnu"
+
+
+def _addr(n):
+    return f"0x{0x400000 + n * 0x10:016x}"
+
+
+def stack_frames(frames=10000, token=5):
+    frame = (
+        'frame={{level="{0}",addr="{1}",func="recurse(int, std::vector<int> const&)",'
+        'file="recurse.cpp",fullname="' + SRC_ROOT + '/recurse.cpp",line="{2}",arch="i386:x86-64"}}'
+    )
+    body = ",".join(frame.format(i, _addr(i), 40 + i % 7) for i in range(frames))
+    return [f"{token:04}^done,stack=[{body}]\n"]
+
+
+def breakpoint_locations(locations=2000, number=1):
+    location = (
+        '{{number="{0}.{1}",enabled="y",addr="{2}",func="inlined_helper(int)",'
+        'file="helper.h",fullname="' + SRC_ROOT + '/module{3}/helper.h",line="17",thread-groups=["i1"]}}'
+    )
+    body = ",".join(location.format(number, i + 1, _addr(i), i % 50) for i in range(locations))
+    return [
+        f'=breakpoint-created,bkpt={{number="{number}",type="breakpoint",disp="keep",enabled="y",'
+        f'addr="<MULTIPLE>",times="0",original-location="inlined_helper",locations=[{body}]}}\n'
+    ]
+
+
+def library_storm(libraries=5000):
+    record = (
+        '=library-loaded,id="{0}/libmod{1}.so.1",target-name="{0}/libmod{1}.so.1",'
+        'host-name="{0}/libmod{1}.so.1",symbols-loaded="0",thread-group="i1",'
+        'ranges=[{{from="{2}",to="{3}"}}]\n'
+    )
+    return ['=thread-group-added,id="i1"\n'] + [
+        record.format(LIB_ROOT, i, _addr(i * 4096), _addr(i * 4096 + 2048)) for i in range(libraries)
+    ]
+
+
+def console_stream(lines=5000, width=200, seed=0):
+    rnd = random.Random(seed)
+    words = ['value', '\\"quoted\\"', 'path\\\\to\\\\file', '\\t', 'x = {a = 1, b = 2}', '\\303\\251t\\303\\251']
+    records = []
+    for _ in range(lines):
+        text = []
+        size = 0
+        while size < width:
+            word = rnd.choice(words)
+            text.append(word)
+            size += len(word) + 1
+        records.append('~"' + " ".join(text) + '\\n"\n')
+    return records
+
+
+def stop_events(stops=2000):
+    record = (
+        '*stopped,reason="end-stepping-range",frame={{addr="{0}",func="loop",args=[{{name="i",value="{1}"}}],'
+        'file="loop.c",fullname="' + SRC_ROOT + '/loop.c",line="{2}",arch="i386:x86-64"}},'
+        'thread-id="1",stopped-threads="all",core="3"\n'
+    )
+    records = []
+    for i in range(stops):
+        records.append('*running,thread-id="all"\n')
+        records.append(record.format(_addr(i % 3), i, 10 + i % 3))
+        records.append("(gdb) \n")
+    return records
+
+
+def source_tree(root, modules=50):
+    """Create the source files the corpora refer to, with root for SRC_ROOT.
+
+    Sessions only show files that exist, so benchmarks of the UI path map
+    SRC_ROOT to root with path_substitutions.
+    """
+    paths = ["loop.c", "recurse.cpp"] + [f"module{i}/helper.h" for i in range(modules)]
+    for path in paths:
+        path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "a").close()
+
+
+CORPORA = {
+    "stack": stack_frames,
+    "breakpoint": breakpoint_locations,
+    "library": library_storm,
+    "console": console_stream,
+    "stops": stop_events,
+}
+
+
+def generate(name, scale=1.0):
+    """Build the named corpus, with its default size multiplied by scale."""
+    gen = CORPORA[name]
+    size = gen.__defaults__[0]
+    return gen(max(1, int(size * scale)))
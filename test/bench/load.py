@@ -0,0 +1,196 @@
+"""End-to-end load test against test/fakegdb.py.
+
+Usage: python3 test/bench/load.py [--stops-per-sec 500] [--duration 5] [--locations 0]
+                                  [--threads 1] [--latency 0] [--nvim nvim]
+
+The fake GDB emits a storm of stops (and optionally an M-location breakpoint
+and K threads) on an MI pty, logging when it wrote each stop. By default the
+pty is read by a Session in this process, through the real UI class on a
+fake editor that records when each batched update would be sent; with
+--nvim, the fake GDB is launched with :GDBMILaunch in a headless Neovim
+running the plugin, and the cursor line is polled over RPC.
+
+Reports events/s handled, and the latency from the stop being written to
+the frame reaching the editor. Every stop is on its own source line, so a
+shown line identifies its stop; stops coalesced away by the UI queue have
+no latency sample.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+FAKEGDB = ROOT / "test" / "fakegdb.py"
+sys.path.insert(0, str(ROOT / "rplugin" / "python3"))
+
+from gdbmi_interface.ui import UI  # noqa: E402
+from gdbmi_interface.stats import Histogram  # noqa: E402
+from gdbmi_interface.gdbmi.session import Session  # noqa: E402
+
+
+class FakeVim:
+    """Runs flushes on the next loop iteration and timestamps each frame sent."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.api = self
+        self.shown = []
+        self.rpcs = 0
+
+    def async_call(self, fn, *args):
+        self.loop.call_soon(fn, *args)
+
+    def call_atomic(self, calls):
+        now = time.monotonic()
+        self.rpcs += 1
+        for _, (func, args) in calls:
+            if func == "gdbmi#util#jump_frame":
+                self.shown.append((now, args[1]))
+        return [None] * len(calls), None
+
+
+def fakegdb_args(args, source, report):
+    return [
+        "--stops-per-sec", str(args.stops_per_sec), "--duration", str(args.duration),
+        "--locations", str(args.locations), "--threads", str(args.threads),
+        "--latency", str(args.latency), "--source", source, "--report", report,
+    ]
+
+
+async def _drain(session, until, quiet=0.5):
+    """Wait past until for the stops to stop coming; returns when the last came."""
+    count, last = session.stop_count, time.monotonic()
+    while True:
+        await asyncio.sleep(0.01)
+        now = time.monotonic()
+        if session.stop_count != count:
+            count, last = session.stop_count, now
+        elif now > until and now - last > quiet:
+            return last
+
+
+async def _probe(session, rtts, until):
+    """Issue a command every 50 ms to see the round trip under load."""
+    while time.monotonic() < until:
+        start = time.monotonic()
+        try:
+            await session.request("-data-evaluate-expression 1+1", timeout=5)
+        except Exception:
+            pass
+        else:
+            rtts.add(time.monotonic() - start)
+        await asyncio.sleep(0.05)
+
+
+def run_in_process(args, source, report):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    vim = FakeVim(loop)
+    ui = UI()
+    ui.setVim(vim)
+    master, slave = os.openpty()
+    session = Session("load", master, os.ttyname(slave), ui)
+    proc = subprocess.Popen(
+        [sys.executable, str(FAKEGDB), "--tty", os.ttyname(slave)] + fakegdb_args(args, source, report)
+    )
+    rtts = Histogram()
+    start = time.monotonic()
+    try:
+        _, last = loop.run_until_complete(asyncio.gather(
+            _probe(session, rtts, start + args.duration),
+            _drain(session, start + args.duration),
+        ))
+    finally:
+        session.stop()
+        session.gdbmi.close()
+        os.close(slave)
+        proc.wait(10)
+    return session.stop_count, last - start, vim.shown, vim.rpcs, rtts
+
+
+def run_nvim(args, source, report):
+    import pynvim
+
+    data = tempfile.mkdtemp(prefix="gdbmi-load-")
+    env = dict(os.environ, XDG_DATA_HOME=data, XDG_CONFIG_HOME=data, XDG_STATE_HOME=data)
+    rtp = ["--cmd", f"set rtp^={ROOT}"]
+    # register the remote plugin in a private manifest
+    subprocess.run([args.nvim, "--headless", *rtp, "-c", "UpdateRemotePlugins", "-c", "qa!"],
+                   env=env, check=True)
+    os.environ.update(env)
+    vim = pynvim.attach("child", argv=[args.nvim, "--embed", "--headless", *rtp])
+    cmd = " ".join([sys.executable, str(FAKEGDB)] + fakegdb_args(args, source, report))
+    vim.command(f"GDBMILaunch {cmd}")
+    line_expr = "line('.', win_getid(t:gdbmi_win_jump_window))"
+
+    shown = []
+    line = None
+    start = changed = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if now > start + args.duration and now - changed > 0.5:
+            break
+        current = vim.eval(line_expr)
+        if current != line:
+            line, changed = current, time.monotonic()
+            shown.append((changed, line))
+        time.sleep(0.002)
+    elapsed = changed - start
+    vim.command("GDBMIDebugStop")
+    vim.close()
+    return None, elapsed, shown, None, None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--stops-per-sec", type=float, default=500)
+    ap.add_argument("--duration", type=float, default=5)
+    ap.add_argument("--locations", type=int, default=0)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--latency", type=float, default=0, help="fake GDB command latency, ms")
+    ap.add_argument("--nvim", help="run against this headless Neovim instead of in process")
+    args = ap.parse_args(argv)
+
+    expected = int(args.stops_per_sec * args.duration)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "load.c")
+        with open(source, "w") as f:
+            f.write("int work;\n" * (expected + 1))
+        report = os.path.join(tmp, "stops")
+
+        run = run_nvim if args.nvim else run_in_process
+        handled, elapsed, shown, rpcs, rtts = run(args, source, report)
+
+        with open(report) as f:
+            sent = {int(n): float(t) for n, t in (line.split() for line in f)}
+
+    latency = Histogram()
+    for when, line in shown:
+        stop = line - 1
+        if stop in sent:
+            latency.add(when - sent[stop])
+
+    print(f"{len(sent)} stops sent in {args.duration}s "
+          f"({args.stops_per_sec:g}/s, {args.threads} threads, {args.locations} locations)")
+    observed = handled if handled is not None else len(shown)
+    if not observed or elapsed <= 0:
+        print("FAIL: no stops observed; did the fake debugger attach?", file=sys.stderr)
+        return 1
+    if handled is not None:
+        print(f"handled {handled} stops: {handled / elapsed:,.0f} events/s, {rpcs} editor RPCs")
+    print(f"{len(shown)} frames shown, latency ms: mean "
+          f"{latency.total / max(latency.count, 1) * 1e3:.2f}  p50 {latency.percentile(50) * 1e3:.2f}  "
+          f"p99 {latency.percentile(99) * 1e3:.2f}  max {latency.max * 1e3:.2f}")
+    if rtts is not None and rtts.count:
+        print(f"command round trip under load, ms: p50 {rtts.percentile(50) * 1e3:.2f}  "
+              f"p99 {rtts.percentile(99) * 1e3:.2f}  max {rtts.max * 1e3:.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Replay a recorded MI transcript into a Session, without GDB.
+
+Usage: python3 test/bench/replay.py TRANSCRIPT [--speed 1.0] [--direct] [--parser scan]
+                                    [--save out.json] [--compare old.json]
+
+Transcripts are recorded with g:gdbmi_record_dir. The bytes GDB sent are
+written to a raw pty in front of a Session with a counting stub UI, at the
+recorded pace (--speed 2 is twice as fast, --speed 0 as fast as the pty
+takes them), or with --direct handed straight to Session._feed, which is
+deterministic and measures only parsing and handling. Commands the session
+sends are read and dropped; their results come from the transcript, so the
+session will log their tokens as unexpected.
+"""
+
+import os
+import sys
+import tty
+import json
+import time
+import asyncio
+import argparse
+import collections
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "rplugin" / "python3"))
+
+from gdbmi_interface.gdbmi.parse import PARSERS  # noqa: E402
+from gdbmi_interface.gdbmi.session import Session  # noqa: E402
+from gdbmi_interface.gdbmi.transcript import READ, read_transcript  # noqa: E402
+
+
+class CountingUI:
+    """Counts the UI calls of the session and drops them."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls[name] += 1
+
+        return call
+
+
+def replay_direct(session, frames):
+    start = time.perf_counter()
+    for _, data in frames:
+        session._feed(data)
+    return time.perf_counter() - start
+
+
+async def _writable(loop, fd):
+    future = loop.create_future()
+    loop.add_writer(fd, future.set_result, None)
+    try:
+        await future
+    finally:
+        loop.remove_writer(fd)
+
+
+async def replay_pty(session, slave, frames, speed):
+    loop = asyncio.get_event_loop()
+    total = sum(len(data) for _, data in frames)
+    start = time.perf_counter()
+    for seconds, data in frames:
+        if speed:
+            delay = start + seconds / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(slave, view):]
+            except BlockingIOError:
+                await _writable(loop, slave)
+    while session.stats.counters["pty bytes read"] < total:
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("transcript")
+    ap.add_argument("--speed", type=float, default=1.0, help="0 replays as fast as possible")
+    ap.add_argument("--direct", action="store_true", help="feed the session without a pty")
+    ap.add_argument("--parser", default="scan", choices=sorted(PARSERS))
+    ap.add_argument("--save", help="write the results as json")
+    ap.add_argument("--compare", help="json from a previous --save to compare against")
+    args = ap.parse_args(argv)
+
+    frames = [(t, data) for t, direction, data in read_transcript(args.transcript) if direction == READ]
+    size = sum(len(data) for _, data in frames)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    os.set_blocking(slave, False)
+    # drop what the session sends, so its writes never block
+    loop.add_reader(slave, lambda: os.read(slave, 65536))
+    ui = CountingUI()
+    session = Session("replay", master, os.ttyname(slave), ui, args.parser)
+    try:
+        if args.direct:
+            elapsed = replay_direct(session, frames)
+        else:
+            elapsed = loop.run_until_complete(replay_pty(session, slave, frames, args.speed))
+    finally:
+        loop.remove_reader(slave)
+        session.stop()
+        session.gdbmi.close()
+        os.close(slave)
+
+    records = sum(h.count for (section, _), h in session.stats.timings.items() if section == "parse")
+    results = {
+        "records": records,
+        "bytes": size,
+        "seconds": elapsed,
+        "records_per_sec": records / elapsed if elapsed else 0.0,
+        "ui_calls": dict(ui.calls),
+    }
+    print(f"{len(frames)} reads, {size:,} bytes, {records:,} records in {elapsed:.3f}s: "
+          f"{results['records_per_sec']:,.0f} records/s, {size / elapsed / 1e6:.2f} MB/s")
+    print("ui calls:", ", ".join(f"{k}={v}" for k, v in sorted(ui.calls.items())) or "none")
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"vs {args.compare}: {results['records_per_sec'] / old['records_per_sec']:.2f}x records/s"
+              + ("" if old["ui_calls"] == results["ui_calls"] else ", ui calls differ"))
+    print()
+    print("\n".join(session.stats.report("replay")))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
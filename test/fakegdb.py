@@ -0,0 +1,348 @@
+"""A stand-in for GDB that speaks just enough MI for load tests.
+
+Usage: python3 test/fakegdb.py [--tty /dev/pts/N] [--latency MS] [--stops-per-sec N]
+                               [--duration S] [--locations M] [--threads K]
+                               [--source FILE] [--report FILE] [--symbols N]
+
+Run it as the debugger (:GDBMILaunch python3 test/fakegdb.py ...): it reads
+the CLI from stdin like GDB does, attaches to the pty of "new-ui mi PATH",
+and answers "break FILE:LINE", "delete N", "next", "step", "continue",
+"finish" and "quit". With --tty it attaches to an MI pty right away.
+
+On the MI pty it answers tokened -exec-*, -data-evaluate-expression,
+-break-insert, -dprintf-insert, -break-delete, -list-thread-groups,
+-symbol-info-functions (N functions in --source), -interpreter-exec,
+-var-* and -stack-* commands after --latency
+milliseconds, and ^error for anything else. Once attached it announces K
+threads and an M-location breakpoint, then emits --stops-per-sec stops for
+--duration seconds. Stop n is reported at line n % (lines of --source) + 1
+of thread n % K + 1; with --report, "n monotonic-time" is written for each
+stop, so the receiving side can compute latencies.
+"""
+
+import os
+import re
+import sys
+import tty
+import time
+import asyncio
+import argparse
+
+
+def mi_string(s):
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+MI_WORD = re.compile(r'"(?:[^"\\]|\\.)*"|\S+')
+# options of -break-insert and -dprintf-insert that take a value
+INSERT_VALUE_OPTIONS = {"-c", "-i", "-p"}
+
+
+def mi_unquote(word):
+    if word.startswith('"'):
+        return re.sub(r"\\(.)", r"\1", word[1:-1])
+    return word
+
+
+def insert_arguments(rest):
+    """Options and positional arguments of -break-insert or -dprintf-insert.
+
+    Options map to their unquoted value, or True. Positional arguments are
+    the location, then for -dprintf-insert the format and its arguments;
+    they are returned as MI words, quoted if they were.
+    """
+    words = MI_WORD.findall(rest)
+    options = {}
+    i = 0
+    while i < len(words) and words[i].startswith("-"):
+        if words[i] == "--":
+            i += 1
+            break
+        if words[i] in INSERT_VALUE_OPTIONS and i + 1 < len(words):
+            options[words[i]] = mi_unquote(words[i + 1])
+            i += 2
+        else:
+            options[words[i]] = True
+            i += 1
+    return options, words[i:]
+
+
+class FakeGDB:
+    def __init__(self, args):
+        self.args = args
+        self.loop = asyncio.get_event_loop()
+        self.fd = None
+        self.buffer = b""
+        self.cli_buffer = b""
+        self.source = os.path.abspath(args.source)
+        with open(self.source, "rb") as f:
+            self.lines = max(1, sum(1 for _ in f))
+        self.stops = 0
+        self.breakpoints = 0
+        self.varobjs = 0
+        self.level = 0
+        self.report = open(args.report, "w") if args.report else None
+        self.done = self.loop.create_future()
+
+    # MI side
+
+    def attach(self, path):
+        if self.fd is not None:
+            return
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        tty.setraw(self.fd)
+        self.loop.add_reader(self.fd, self.read_mi)
+        self.send('=thread-group-added,id="i1"')
+        self.send('=thread-group-started,id="i1",pid="4242"')
+        for thread in range(1, self.args.threads + 1):
+            self.send(f'=thread-created,id="{thread}",group-id="i1"')
+        if self.args.locations:
+            self.send("=breakpoint-created,bkpt=" + self.breakpoint(self.args.locations))
+        self.prompt()
+        self.loop.create_task(self.storm())
+
+    def send(self, record):
+        data = (record + "\n").encode()
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def prompt(self):
+        self.send("(gdb) ")
+
+    def frame(self, line, level=0):
+        name = os.path.basename(self.source)
+        return (
+            f'{{level="{level}",addr="0x{0x401000 + line * 4:016x}",func="work",args=[],'
+            f"file={mi_string(name)},fullname={mi_string(self.source)},line=\"{line}\","
+            'arch="i386:x86-64"}'
+        )
+
+    def breakpoint(self, locations, line=1, fullname=None, type="breakpoint", fields=""):
+        self.breakpoints += 1
+        n = self.breakpoints
+        fullname = fullname or self.source
+        common = 'enabled="y",func="work",file=' + mi_string(os.path.basename(fullname))
+        if locations == 1:
+            return (
+                f'{{number="{n}",type="{type}",disp="keep",{common},'
+                f'fullname={mi_string(fullname)},line="{line}",addr="0x{0x401000 + line * 4:016x}",'
+                f'thread-groups=["i1"],times="0"{fields},original-location={mi_string(f"{fullname}:{line}")}}}'
+            )
+        locs = ",".join(
+            f'{{number="{n}.{i + 1}",{common},fullname={mi_string(self.source)},'
+            f'line="{i % self.lines + 1}",addr="0x{0x500000 + i * 16:016x}",thread-groups=["i1"]}}'
+            for i in range(locations)
+        )
+        return (
+            f'{{number="{n}",type="breakpoint",disp="keep",enabled="y",addr="<MULTIPLE>",'
+            f'times="0",original-location="work",locations=[{locs}]}}'
+        )
+
+    def location_breakpoint(self, location, type="breakpoint", fields=""):
+        """A breakpoint on FILE:LINE, or on line 1 of --source otherwise."""
+        file, _, line = location.strip('"').rpartition(":")
+        if not line.isdigit():
+            return self.breakpoint(1, type=type, fields=fields)
+        return self.breakpoint(1, int(line), os.path.abspath(file) if file else None, type, fields)
+
+    def inserted_breakpoint(self, op, rest):
+        """The bkpt answering -break-insert or -dprintf-insert, with its options.
+
+        A dprintf carries its printf command as GDB 9-12 send it, in a
+        tuple of strings: script={"printf \"fmt\",args"}.
+        """
+        options, positional = insert_arguments(rest)
+        location = mi_unquote(positional[0]) if positional else ""
+        fields = ""
+        if "-c" in options:
+            fields += f",cond={mi_string(options['-c'])}"
+        if "-i" in options:
+            fields += f',ignore="{options["-i"]}"'
+        bkpt = self.location_breakpoint(
+            location, "dprintf" if op == "-dprintf-insert" else "breakpoint", fields
+        )
+        if op == "-dprintf-insert":
+            command = "printf " + ",".join(positional[1:2] + [mi_unquote(a) for a in positional[2:]])
+            bkpt = bkpt[:-1] + f",script={{{mi_string(command)}}}}}"
+        if "-d" in options:
+            bkpt = bkpt.replace('enabled="y"', 'enabled="n"', 1)
+        if "-t" in options:
+            bkpt = bkpt.replace('disp="keep"', 'disp="del"', 1)
+        return bkpt
+
+    def stop(self, reason="end-stepping-range"):
+        self.level = 0
+        n = self.stops
+        self.stops += 1
+        line = n % self.lines + 1
+        thread = n % self.args.threads + 1
+        self.send('*running,thread-id="all"')
+        self.send(
+            f'*stopped,reason="{reason}",frame={self.frame(line)},'
+            f'thread-id="{thread}",stopped-threads="all",core="0"'
+        )
+        self.prompt()
+        if self.report:
+            self.report.write(f"{n} {time.monotonic()}\n")
+
+    async def storm(self):
+        if not self.args.stops_per_sec:
+            return
+        interval = 1 / self.args.stops_per_sec
+        start = time.monotonic()
+        end = start + self.args.duration
+        n = 0
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            # catch up in bursts if the writes fell behind
+            while start + n * interval <= now:
+                self.stop()
+                n += 1
+            await asyncio.sleep(max(0, start + n * interval - time.monotonic()))
+        if self.report:
+            self.report.flush()
+        self.send(f'~"storm done: {n} stops\\n"')
+
+    def read_mi(self):
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError:
+            data = b""
+        if not data:
+            self.loop.remove_reader(self.fd)
+            if not self.done.done():
+                self.done.set_result(None)
+            return
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            line = line.decode().strip()
+            if line:
+                self.loop.call_later(self.args.latency / 1000, self.answer, line)
+
+    def answer(self, line):
+        digits = len(line) - len(line.lstrip("0123456789"))
+        token, command = line[:digits], line[digits:]
+        op, _, rest = command.partition(" ")
+        argv = rest.split()
+
+        if op.startswith("-exec-"):
+            self.send(f"{token}^running")
+            # stop() ends with the prompt
+            self.stop("breakpoint-hit" if op == "-exec-continue" else "end-stepping-range")
+            return
+        elif op == "-data-evaluate-expression":
+            self.send(f'{token}^done,value="42"')
+        elif op in ("-break-insert", "-dprintf-insert"):
+            self.send(f"{token}^done,bkpt=" + self.inserted_breakpoint(op, rest))
+        elif op == "-list-thread-groups":
+            self.send(f'{token}^done,groups=[{{id="i1",type="process",pid="4242",'
+                      f'executable={mi_string(os.path.abspath(__file__))}}}]')
+        elif op == "-symbol-info-functions":
+            symbols = ",".join(
+                f'{{line="{i % self.lines + 1}",name="fn_{i:06d}",type="int (void)",'
+                f'description="int fn_{i:06d}(void);"}}'
+                for i in range(self.args.symbols)
+            )
+            self.send(
+                f'{token}^done,symbols={{debug=[{{filename={mi_string(os.path.basename(self.source))},'
+                f"fullname={mi_string(self.source)},symbols=[{symbols}]}}],"
+                'nondebugging=[{address="0x0000000000401000",name="_start"}]}'
+            )
+        elif op == "-break-delete":
+            self.send(f"{token}^done")
+        elif op == "-var-create":
+            self.varobjs += 1
+            self.send(f'{token}^done,name="var{self.varobjs}",numchild="0",value="42",type="int",has_more="0"')
+        elif op == "-var-update":
+            self.send(f"{token}^done,changelist=[]")
+        elif op in ("-var-delete", "-var-list-children"):
+            self.send(f'{token}^done,numchild="0"')
+        elif op == "-stack-select-frame":
+            self.level = int(argv[0]) if argv and argv[0].isdigit() else 0
+            self.send(f"{token}^done")
+        elif op == "-stack-info-frame":
+            self.send(f"{token}^done,frame=" + self.frame(self.stops % self.lines + 1, self.level))
+        elif op == "-interpreter-exec":
+            self.send(f"{token}^done")
+        elif op == "-gdb-exit":
+            self.send(f"{token}^exit")
+            self.quit()
+            return
+        else:
+            self.send(f'{token}^error,msg={mi_string("Undefined MI command: " + op.lstrip("-"))}')
+        self.prompt()
+
+    # CLI side
+
+    def read_cli(self):
+        data = os.read(sys.stdin.fileno(), 4096)
+        if not data:
+            self.quit()
+            return
+        self.cli_buffer += data
+        *lines, self.cli_buffer = self.cli_buffer.split(b"\n")
+        for line in lines:
+            self.cli(line.decode().split())
+
+    def cli(self, argv):
+        if not argv:
+            pass
+        elif argv[:2] == ["new-ui", "mi"] and len(argv) > 2:
+            self.attach(argv[2])
+        elif self.fd is None:
+            pass
+        elif argv[0] in ("n", "next", "s", "step", "finish", "until", "advance"):
+            self.stop()
+        elif argv[0] in ("c", "continue", "run", "r"):
+            self.stop("breakpoint-hit")
+        elif argv[0] in ("b", "break") and len(argv) > 1:
+            self.send("=breakpoint-created,bkpt=" + self.location_breakpoint(argv[1]))
+        elif argv[0] in ("d", "delete") and len(argv) > 1:
+            self.send(f'=breakpoint-deleted,id="{argv[1]}"')
+        elif argv[0] in ("q", "quit"):
+            self.quit()
+            return
+        sys.stdout.write("(gdb) ")
+        sys.stdout.flush()
+
+    def quit(self):
+        if self.report:
+            self.report.close()
+            self.report = None
+        if not self.done.done():
+            self.done.set_result(None)
+
+    async def run(self):
+        if self.args.tty:
+            # driven by a harness, which closes the pty when it is done
+            self.attach(self.args.tty)
+        else:
+            self.loop.add_reader(sys.stdin.fileno(), self.read_cli)
+            sys.stdout.write("(gdb) ")
+            sys.stdout.flush()
+        await self.done
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tty", help="MI pty to attach to right away")
+    ap.add_argument("--latency", type=float, default=0, help="milliseconds before answering a command")
+    ap.add_argument("--stops-per-sec", type=float, default=0)
+    ap.add_argument("--duration", type=float, default=5)
+    ap.add_argument("--locations", type=int, default=0, help="locations of the initial breakpoint")
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--source", default=__file__, help="file the frames point into")
+    ap.add_argument("--report", help="write 'stop monotonic-time' lines here")
+    ap.add_argument("--symbols", type=int, default=100, help="functions -symbol-info-functions lists")
+    args = ap.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(FakeGDB(args).run())
+
+
+if __name__ == "__main__":
+    main()